@@ -0,0 +1,137 @@
+"""
+Micro-benchmark of callback query dispatch: the cost of finding the handler.
+
+Usage:
+    python -m benchmarks.dispatch [--routes 5 20 100] [--iterations 5000]
+
+A router with N ``prefix:arg`` routes and no-op handlers is fed callback
+queries for the first and the last route, dispatched three ways:
+
+    magic   one handler per route with an ``F.data.startswith(...)`` filter
+    codec   one handler per route with a ``CallbackData.filter()``
+    table   a single CallbackTable, the way bot.handlers route callbacks
+
+Latency is per update through ``Dispatcher.feed_update``, in microseconds;
+the ``baseline`` row feeds an update to a dispatcher without handlers, so the
+difference to it is the cost of finding the handler.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import types
+from datetime import datetime
+
+from aiogram import Dispatcher, F, Router
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+from benchmarks.fake_bot import create_fake_bot
+from bot.callbacks import CallbackTable
+
+DEFAULT_ROUTES = (5, 20, 100)
+DEFAULT_ITERATIONS = 5000
+WARMUP_ITERATIONS = 200
+STRATEGIES = ('magic', 'codec', 'table')
+
+
+def build_codecs(count):
+    """Create ``count`` CallbackData classes with an int argument, route_0 .. route_N."""
+    return [
+        types.new_class(
+            f"Route{i}Callback", (CallbackData,), {'prefix': f"route_{i}"},
+            lambda ns: ns.update({'__annotations__': {'arg': int}})
+        )
+        for i in range(count)
+    ]
+
+
+async def noop(callback: CallbackQuery):
+    pass
+
+
+def build_router(strategy, codecs):
+    """Create a router dispatching every codec's callback data with the given strategy."""
+    router = Router()
+    if strategy == 'magic':
+        for codec in codecs:
+            router.callback_query.register(noop, F.data.startswith(f"{codec.__prefix__}:"))
+    elif strategy == 'codec':
+        for codec in codecs:
+            router.callback_query.register(noop, codec.filter())
+    else:
+        table = CallbackTable(router)
+        for codec in codecs:
+            table(codec)(noop)
+    return router
+
+
+def build_update(update_id, data):
+    """Build a callback query update as if a channel button was pressed."""
+    user = User(id=2000, is_bot=False, first_name="Bench")
+    message = Message(
+        message_id=1,
+        date=datetime.now(),
+        chat=Chat(id=-100, type="channel")
+    )
+    return Update(
+        update_id=update_id,
+        callback_query=CallbackQuery(
+            id=str(update_id), from_user=user, chat_instance="bench", message=message, data=data
+        )
+    )
+
+
+async def measure(dp, bot, update, iterations):
+    """Feed the same update repeatedly and get per-update latencies in microseconds."""
+    for _ in range(WARMUP_ITERATIONS):
+        await dp.feed_update(bot, update)
+
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await dp.feed_update(bot, update)
+        timings.append((time.perf_counter() - started) * 1_000_000)
+    timings.sort()
+    return {
+        'p50_us': timings[len(timings) // 2],
+        'p99_us': timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+        'mean_us': statistics.fmean(timings)
+    }
+
+
+async def run(route_counts, iterations):
+    bot = create_fake_bot()
+    print(f"{'routes':>6}  {'strategy':<8} {'target':<6} {'p50 us':>9} {'p99 us':>9} {'mean us':>9}")
+    try:
+        result = await measure(Dispatcher(), bot, build_update(1, "route_0:1"), iterations)
+        print(
+            f"{0:>6}  {'baseline':<8} {'-':<6} "
+            f"{result['p50_us']:>9.1f} {result['p99_us']:>9.1f} {result['mean_us']:>9.1f}"
+        )
+        for count in route_counts:
+            codecs = build_codecs(count)
+            targets = {'first': codecs[0](arg=1).pack(), 'last': codecs[-1](arg=1).pack()}
+            for strategy in STRATEGIES:
+                dp = Dispatcher()
+                dp.include_router(build_router(strategy, codecs))
+                for target, data in targets.items():
+                    result = await measure(dp, bot, build_update(1, data), iterations)
+                    print(
+                        f"{count:>6}  {strategy:<8} {target:<6} "
+                        f"{result['p50_us']:>9.1f} {result['p99_us']:>9.1f} {result['mean_us']:>9.1f}"
+                    )
+    finally:
+        await bot.session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark callback query dispatch strategies.")
+    parser.add_argument('--routes', type=int, nargs='+', default=list(DEFAULT_ROUTES))
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS)
+    args = parser.parse_args()
+    asyncio.run(run(args.routes, args.iterations))
+
+
+if __name__ == '__main__':
+    main()
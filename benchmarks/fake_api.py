@@ -0,0 +1,383 @@
+"""
+Local stand-in for the Telegram Bot API, for load testing without touching Telegram.
+
+Usage:
+    python -m benchmarks.fake_api [--port 8081] [--flood-limit 30] [--error-rate 0.01]
+
+Point the bot at it with TELEGRAM_API_URL=http://127.0.0.1:8081. Updates are
+injected in process by the load generator (``benchmarks.load``) and served by
+getUpdates, or POSTed to the URL registered with setWebhook, like Telegram does.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import Counter, deque
+from contextlib import suppress
+from itertools import count, islice
+
+from aiohttp import ClientError, ClientSession, ClientTimeout, web
+
+# Methods that Telegram does not flood-limit the way it limits sending
+UNLIMITED_METHODS = {'getUpdates', 'getMe', 'setWebhook', 'deleteWebhook', 'getWebhookInfo', 'close', 'logOut'}
+
+# Webhook delivery: concurrent requests (Telegram's default max_connections) and retry delay
+WEBHOOK_CONNECTIONS = 40
+WEBHOOK_RETRY_DELAY = 0.1
+WEBHOOK_TIMEOUT = 10
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+class _ApiError(Exception):
+    """Bot API error answered with ``ok: false``."""
+
+    def __init__(self, code, description):
+        super().__init__(description)
+        self.code = code
+        self.description = description
+
+
+def _parse_value(value):
+    """Decode a form field the way aiogram encodes it (JSON for non-scalars)."""
+    if not isinstance(value, str):
+        return value
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+class FakeTelegramAPI:
+    """
+    In-memory Bot API server with injectable updates and simulated 429s.
+
+    Every injected update returns a future that resolves when the bot has
+    answered it: callback queries on ``answerCallbackQuery``, messages on the
+    next ``sendMessage`` to the same chat.
+
+    Once the bot calls setWebhook, queued updates are POSTed to the webhook URL
+    with its secret token and getUpdates is refused, as on Telegram; failed
+    deliveries are retried.
+    """
+
+    def __init__(self, flood_limit=None, error_rate=0.0, retry_after=1, webhook_connections=WEBHOOK_CONNECTIONS):
+        self.flood_limit = flood_limit  # requests per second before answering 429
+        self.error_rate = error_rate  # share of requests answered with a random 429
+        self.retry_after = retry_after
+        self.calls = Counter()
+        self.flood_responses = 0
+        self._updates = deque()
+        self._new_updates = asyncio.Event()
+        self._update_ids = count(1)
+        self._callback_ids = count(1)
+        self._message_ids = count(1)
+        self._waiters = {}
+        self._window = deque()
+        self.webhook = None  # (url, secret_token) registered with setWebhook
+        self.webhook_connections = webhook_connections
+        self.webhook_statuses = Counter()  # HTTP status of every delivery, 0 for connection errors
+        self._delivery_task = None
+        self._handlers = {
+            'getMe': self._get_me,
+            'getUpdates': self._get_updates,
+            'setWebhook': self._set_webhook,
+            'deleteWebhook': self._delete_webhook,
+            'getWebhookInfo': self._get_webhook_info,
+            'sendMessage': self._send_message,
+            'editMessageText': self._edit_message_text,
+            'pinChatMessage': self._ok,
+            'unpinChatMessage': self._ok,
+            'answerCallbackQuery': self._answer_callback_query,
+        }
+
+    def build_app(self):
+        """Create the aiohttp application serving ``/bot<token>/<method>``."""
+        app = web.Application()
+        app.router.add_route('*', '/bot{token}/{method}', self._handle)
+        return app
+
+    async def start(self, host='127.0.0.1', port=8081):
+        """Start serving in the running event loop and return the AppRunner."""
+        app = self.build_app()
+        app.on_cleanup.append(self._stop_delivery)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
+    # Update injection
+
+    def push_callback(self, user_id, data, chat=None):
+        """Queue a callback query and get a future resolved when it is answered."""
+        callback_id = str(next(self._callback_ids))
+        chat = chat or {'id': user_id, 'type': 'private', 'first_name': f"User {user_id}"}
+        update = {
+            'callback_query': {
+                'id': callback_id,
+                'from': self._user(user_id),
+                'chat_instance': 'load',
+                'data': data,
+                'message': {'message_id': 1, 'date': int(time.time()), 'chat': chat, 'text': 'menu'}
+            }
+        }
+        return self._push(update, ('callback', callback_id))
+
+    def push_message(self, user_id, text):
+        """Queue a private message and get a future resolved by the bot's next reply to it."""
+        message = {
+            'message_id': next(self._message_ids),
+            'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private', 'first_name': f"User {user_id}"},
+            'from': self._user(user_id),
+            'text': text
+        }
+        if text.startswith('/'):
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+        return self._push({'message': message}, ('chat', user_id))
+
+    def _push(self, update, key):
+        update['update_id'] = next(self._update_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, deque()).append(future)
+        self._updates.append(update)
+        self._new_updates.set()
+        return future
+
+    def _resolve(self, key):
+        waiters = self._waiters.get(key)
+        while waiters:
+            future = waiters.popleft()
+            if not future.done():
+                future.set_result(time.perf_counter())
+                break
+        if not waiters:
+            self._waiters.pop(key, None)
+
+    @staticmethod
+    def _user(user_id):
+        return {'id': user_id, 'is_bot': False, 'first_name': f"User {user_id}"}
+
+    # Request handling
+
+    async def _handle(self, request):
+        method = request.match_info['method']
+        self.calls[method] += 1
+
+        if request.content_type == 'application/json':
+            params = await request.json()
+        else:
+            params = {key: _parse_value(value) for key, value in (await request.post()).items()}
+
+        if method not in UNLIMITED_METHODS and self._flooded():
+            self.flood_responses += 1
+            return web.json_response({
+                'ok': False,
+                'error_code': 429,
+                'description': f"Too Many Requests: retry after {self.retry_after}",
+                'parameters': {'retry_after': self.retry_after}
+            }, status=429)
+
+        handler = self._handlers.get(method, self._ok)
+        try:
+            result = await handler(params, request.match_info['token'])
+        except _ApiError as e:
+            return web.json_response(
+                {'ok': False, 'error_code': e.code, 'description': e.description}, status=e.code
+            )
+        return web.json_response({'ok': True, 'result': result})
+
+    def _flooded(self):
+        if self.error_rate and random.random() < self.error_rate:
+            return True
+        if not self.flood_limit:
+            return False
+
+        now = time.monotonic()
+        while self._window and now - self._window[0] > 1:
+            self._window.popleft()
+        if len(self._window) >= self.flood_limit:
+            return True
+        self._window.append(now)
+        return False
+
+    async def _ok(self, params, token):
+        return True
+
+    async def _get_me(self, params, token):
+        return {'id': int(token.split(':')[0]), 'is_bot': True, 'first_name': 'Fake Bot', 'username': 'fake_bot'}
+
+    async def _get_updates(self, params, token):
+        if self.webhook is not None:
+            raise _ApiError(409, "Conflict: can't use getUpdates method while webhook is active; "
+                                 "use deleteWebhook to delete the webhook first")
+
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        timeout = float(params.get('timeout') or 0)
+
+        while self._updates and self._updates[0]['update_id'] < offset:
+            self._updates.popleft()
+
+        if not self._updates and timeout:
+            self._new_updates.clear()
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._new_updates.wait(), timeout)
+
+        return list(islice(self._updates, limit))
+
+    # Webhook delivery
+
+    async def _set_webhook(self, params, token):
+        self.webhook = (params['url'], params.get('secret_token'))
+        if params.get('drop_pending_updates'):
+            self._updates.clear()
+        if self._delivery_task is None or self._delivery_task.done():
+            self._delivery_task = asyncio.create_task(self._deliver_updates())
+        self._new_updates.set()
+        return True
+
+    async def _delete_webhook(self, params, token):
+        self.webhook = None
+        if params.get('drop_pending_updates'):
+            self._updates.clear()
+        # Wake the delivery loop so it notices the webhook is gone
+        self._new_updates.set()
+        return True
+
+    async def _get_webhook_info(self, params, token):
+        return {
+            'url': self.webhook[0] if self.webhook else '',
+            'has_custom_certificate': False,
+            'pending_update_count': len(self._updates),
+            'max_connections': self.webhook_connections
+        }
+
+    async def _deliver_updates(self):
+        semaphore = asyncio.Semaphore(self.webhook_connections)
+        deliveries = set()
+
+        async with ClientSession(timeout=ClientTimeout(total=WEBHOOK_TIMEOUT)) as session:
+            try:
+                while self.webhook is not None:
+                    if not self._updates:
+                        self._new_updates.clear()
+                        await self._new_updates.wait()
+                        continue
+
+                    await semaphore.acquire()
+                    if self.webhook is None or not self._updates:
+                        semaphore.release()
+                        continue
+                    task = asyncio.create_task(self._deliver(session, self._updates.popleft(), semaphore))
+                    deliveries.add(task)
+                    task.add_done_callback(deliveries.discard)
+            finally:
+                for task in deliveries:
+                    task.cancel()
+                await asyncio.gather(*deliveries, return_exceptions=True)
+
+    async def _deliver(self, session, update, semaphore):
+        try:
+            webhook = self.webhook
+            status = await self.post_update(update, webhook[1] if webhook else None, session)
+            if not 200 <= status < 300:
+                # Telegram keeps retrying an update until the webhook accepts it
+                await asyncio.sleep(WEBHOOK_RETRY_DELAY)
+                self._updates.appendleft(update)
+                self._new_updates.set()
+        finally:
+            semaphore.release()
+
+    async def post_update(self, update, secret_token, session=None):
+        """POST one update to the registered webhook and get the HTTP status, 0 if unreachable."""
+        if self.webhook is None:
+            return 0
+
+        own_session = session is None
+        if own_session:
+            session = ClientSession(timeout=ClientTimeout(total=WEBHOOK_TIMEOUT))
+        headers = {SECRET_HEADER: secret_token} if secret_token else {}
+        try:
+            async with session.post(self.webhook[0], json=update, headers=headers) as response:
+                status = response.status
+        except (ClientError, asyncio.TimeoutError):
+            status = 0
+        finally:
+            if own_session:
+                await session.close()
+
+        self.webhook_statuses[status] += 1
+        return status
+
+    async def probe_webhook(self, secret_token):
+        """Send an empty update with the given secret token, bypassing the queue; returns the HTTP status."""
+        return await self.post_update({'update_id': next(self._update_ids)}, secret_token)
+
+    async def _stop_delivery(self, app):
+        self.webhook = None
+        if self._delivery_task is not None:
+            self._delivery_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._delivery_task
+
+    def _message(self, params, message_id=None):
+        chat_id = params.get('chat_id')
+        if isinstance(chat_id, int):
+            chat = {'id': chat_id, 'type': 'private' if chat_id > 0 else 'supergroup'}
+        else:
+            chat = {'id': -1001000000000, 'type': 'channel', 'username': str(chat_id).lstrip('@')}
+        return {
+            'message_id': message_id or next(self._message_ids),
+            'date': int(time.time()),
+            'chat': chat,
+            'text': params.get('text') or ''
+        }
+
+    async def _send_message(self, params, token):
+        self._resolve(('chat', params.get('chat_id')))
+        return self._message(params)
+
+    async def _edit_message_text(self, params, token):
+        return self._message(params, params.get('message_id'))
+
+    async def _answer_callback_query(self, params, token):
+        self._resolve(('callback', str(params.get('callback_query_id'))))
+        return True
+
+    def stats(self):
+        """Get request counters."""
+        stats = {'calls': dict(self.calls), 'flood_responses': self.flood_responses, 'queued': len(self._updates)}
+        if self.webhook_statuses:
+            stats['webhook_statuses'] = {str(status): n for status, n in sorted(self.webhook_statuses.items())}
+        return stats
+
+
+async def serve(host, port, flood_limit, error_rate):
+    api = FakeTelegramAPI(flood_limit=flood_limit, error_rate=error_rate)
+    runner = await api.start(host, port)
+    logging.info("Fake Bot API listening on http://%s:%s", host, port)
+    try:
+        while True:
+            await asyncio.sleep(10)
+            logging.info("%s", api.stats())
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local fake Telegram Bot API server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--flood-limit', type=float, help="requests per second before answering 429")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of requests answered with 429")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    with suppress(KeyboardInterrupt):
+        asyncio.run(serve(args.host, args.port, args.flood_limit, args.error_rate))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+import json
+from collections import Counter
+from itertools import count
+
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.base import BaseSession
+from aiogram.enums import ParseMode
+from aiogram.types import Message
+
+# Any syntactically valid token works, requests never leave the process
+FAKE_TOKEN = "123456:TEST-benchmark-token"
+FAKE_CHANNEL_CHAT_ID = -1001000000000
+
+
+class FakeSession(BaseSession):
+    """
+    Bot API session that answers every request locally.
+
+    Requests are still serialized and responses parsed through
+    ``check_response``, so the encoding and model validation costs of a real
+    session are part of the measurement.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.calls = Counter()
+        self._message_ids = count(1)
+
+    async def make_request(self, bot, method, timeout=None):
+        self.calls[type(method).__name__] += 1
+
+        files = {}
+        for value in method.model_dump(warnings=False).values():
+            self.prepare_value(value, bot=bot, files=files)
+
+        content = json.dumps({'ok': True, 'result': self._result(method)})
+        response = self.check_response(bot=bot, method=method, status_code=200, content=content)
+        return response.result
+
+    def _result(self, method):
+        if method.__returning__ is not Message and Message not in getattr(method.__returning__, '__args__', ()):
+            return True
+
+        chat_id = getattr(method, 'chat_id', None)
+        if isinstance(chat_id, int):
+            chat = {'id': chat_id, 'type': 'private' if chat_id > 0 else 'supergroup'}
+        else:
+            chat = {'id': FAKE_CHANNEL_CHAT_ID, 'type': 'channel', 'username': str(chat_id).lstrip('@')}
+
+        message_id = getattr(method, 'message_id', None) or next(self._message_ids)
+        return {'message_id': message_id, 'date': 0, 'chat': chat, 'text': getattr(method, 'text', None) or ''}
+
+    async def close(self):
+        pass
+
+    async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+        yield b''
+
+
+def create_fake_bot():
+    """Create a Bot wired to a FakeSession, configured like the one in main.py."""
+    return Bot(
+        token=FAKE_TOKEN,
+        session=FakeSession(),
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML)
+    )
@@ -0,0 +1,315 @@
+"""
+Click-storm load test: run main.py against the fake Bot API and measure sustained throughput.
+
+Usage:
+    python -m benchmarks.load [--rates 50 100 200 400] [--stage-duration 5] [--admins 3]
+                              [--flood-limit 30] [--error-rate 0.01] [--set RATE_LIMIT_GLOBAL=1000]
+                              [--mode webhook]
+
+Each stage offers ``menu_item:`` callbacks at a fixed rate while admin FSM flows
+(price update, publish) run alongside; the report shows achieved updates per
+second and answer latency, and marks the first stage where the bot saturates.
+In webhook mode the fake API POSTs updates to the bot's webhook server, after
+checking that the server rejects an update sent with a wrong secret token.
+"""
+import argparse
+import asyncio
+import json
+import os
+import secrets
+import signal
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from benchmarks.fake_api import FakeTelegramAPI
+from benchmarks.fake_bot import FAKE_TOKEN
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHANNEL = "@load_channel"
+CHANNEL_CHAT = {'id': -1001000000000, 'type': 'channel', 'title': 'Load channel'}
+FIRST_ADMIN_ID = 1_000_000
+FIRST_USER_ID = 2_000_000
+USER_POOL = 5000
+DEFAULT_RATES = (50, 100, 200, 400, 800)
+STARTUP_TIMEOUT = 30
+WEBHOOK_PATH = "/webhook"
+# A stage is saturated when it completes less than this share of the offered rate
+SATURATION_RATIO = 0.9
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def wait_answered(future, sent, timeout):
+    """Get the latency of one injected update, or None if it was not answered in time."""
+    try:
+        answered = await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        return None
+    return answered - sent
+
+
+async def admin_flow(api, admin_id, flow_number, timeout):
+    """Run one price update and publish through the admin FSM, step by step."""
+    steps = (
+        lambda: api.push_message(admin_id, "/admin"),
+        lambda: api.push_callback(admin_id, "update_prices"),
+        lambda: api.push_callback(admin_id, "update_price:new_iphone"),
+        lambda: api.push_message(admin_id, f"https://t.me/load_channel/{flow_number}"),
+        lambda: api.push_callback(admin_id, "confirm_update_url"),
+        lambda: api.push_callback(admin_id, "publish_menu"),
+        lambda: api.push_callback(admin_id, "confirm_publish"),
+    )
+    started = time.perf_counter()
+    for step in steps:
+        if await wait_answered(step(), time.perf_counter(), timeout) is None:
+            return None
+    return time.perf_counter() - started
+
+
+async def run_admins(api, admin_ids, stop, timeout, durations):
+    """Keep every admin running flows until ``stop`` is set."""
+    async def loop_admin(admin_id):
+        flow_number = 0
+        while not stop.is_set():
+            flow_number += 1
+            durations.append(await admin_flow(api, admin_id, flow_number, timeout))
+
+    await asyncio.gather(*(loop_admin(admin_id) for admin_id in admin_ids))
+
+
+async def run_stage(api, rate, duration, item_ids, timeout):
+    """Offer menu clicks at ``rate`` per second for ``duration`` seconds."""
+    loop = asyncio.get_running_loop()
+    total = max(1, int(rate * duration))
+    started = time.perf_counter()
+    waits = []
+
+    for n in range(total):
+        delay = started + n / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        future = api.push_callback(
+            FIRST_USER_ID + n % USER_POOL, f"menu_item:{item_ids[n % len(item_ids)]}", chat=CHANNEL_CHAT
+        )
+        waits.append(loop.create_task(wait_answered(future, time.perf_counter(), timeout)))
+
+    latencies = await asyncio.gather(*waits)
+    elapsed = time.perf_counter() - started
+    answered = sorted(latency for latency in latencies if latency is not None)
+
+    return {
+        'offered_rate': rate,
+        'offered': total,
+        'answered': len(answered),
+        'timed_out': total - len(answered),
+        'achieved_rate': round(len(answered) / elapsed, 1),
+        'p50_ms': round(percentile(answered, 0.50) * 1000, 2) if answered else None,
+        'p99_ms': round(percentile(answered, 0.99) * 1000, 2) if answered else None,
+        'max_ms': round(answered[-1] * 1000, 2) if answered else None,
+    }
+
+
+def read_click_items(db_path):
+    """Get the ids of menu items answered with a click alert, from the bot's database."""
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT id FROM menu_items WHERE COALESCE(url, '') = '' AND type != 'contact' ORDER BY position"
+        ).fetchall()
+    return [row[0] for row in rows]
+
+
+async def start_bot(port, work_dir, admin_ids, overrides, mode='polling', webhook_port=None, webhook_secret=None):
+    """Start main.py against the fake API with a throwaway database."""
+    env = dict(os.environ)
+    env.update({
+        'BOT_TOKEN': FAKE_TOKEN,
+        'BOT_MODE': mode,
+        'TELEGRAM_API_URL': f"http://127.0.0.1:{port}",
+        'DB_PATH': os.path.join(work_dir, 'load.db'),
+        'ADMIN_IDS': ','.join(map(str, admin_ids)),
+        'CHANNEL_ID': CHANNEL,
+        'CHANNEL_IDS': CHANNEL,
+        'AUTO_PUBLISH': 'false',
+    })
+    if mode == 'webhook':
+        env.update({
+            'WEBHOOK_URL': f"http://127.0.0.1:{webhook_port}",
+            'WEBHOOK_PATH': WEBHOOK_PATH,
+            'WEBHOOK_SECRET': webhook_secret,
+            'WEBAPP_HOST': '127.0.0.1',
+            'WEBAPP_PORT': str(webhook_port),
+        })
+    env.update(overrides)
+
+    log = open(os.path.join(work_dir, 'bot.log'), 'wb')
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, 'main.py', cwd=ROOT_DIR, env=env, stdout=log, stderr=log
+    )
+    return process, log, env['DB_PATH']
+
+
+async def wait_for_polling(api, process):
+    """Wait until the bot has started long polling."""
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while api.calls['getUpdates'] == 0:
+        if process.returncode is not None:
+            raise RuntimeError(f"main.py exited with code {process.returncode} during startup")
+        if time.monotonic() > deadline:
+            raise RuntimeError("main.py did not start polling in time")
+        await asyncio.sleep(0.1)
+
+
+async def wait_for_webhook(api, process, secret):
+    """
+    Wait until the bot's webhook server is up, and check that it rejects a wrong secret token.
+
+    Returns:
+        int: HTTP status answered to the update with the wrong secret token
+    """
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while True:
+        if process.returncode is not None:
+            raise RuntimeError(f"main.py exited with code {process.returncode} during startup")
+        if time.monotonic() > deadline:
+            raise RuntimeError("main.py did not start its webhook server in time")
+        if api.webhook is not None:
+            status = await api.probe_webhook(secret + "-wrong")
+            if status:
+                break
+        await asyncio.sleep(0.1)
+
+    if status != 401:
+        raise RuntimeError(f"webhook answered an update with a wrong secret token with HTTP {status}")
+    return status
+
+
+async def stop_bot(process):
+    """Stop main.py gracefully, killing it if it does not exit."""
+    if process.returncode is not None:
+        return
+    process.send_signal(signal.SIGINT)
+    try:
+        await asyncio.wait_for(process.wait(), 15)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+
+
+async def run(args):
+    api = FakeTelegramAPI(flood_limit=args.flood_limit, error_rate=args.error_rate)
+    runner = await api.start('127.0.0.1', args.port)
+    work_dir = tempfile.mkdtemp(prefix="menu_bot_load_")
+    admin_ids = [FIRST_ADMIN_ID + n for n in range(max(args.admins, 1))]
+    overrides = dict(item.split('=', 1) for item in args.set)
+    webhook_secret = secrets.token_urlsafe(16)
+    wrong_secret_status = None
+
+    process, log, db_path = await start_bot(
+        args.port, work_dir, admin_ids, overrides, args.mode, args.webhook_port, webhook_secret
+    )
+    stages = []
+    flow_durations = []
+    try:
+        if args.mode == 'webhook':
+            wrong_secret_status = await wait_for_webhook(api, process, webhook_secret)
+        else:
+            await wait_for_polling(api, process)
+        item_ids = read_click_items(db_path)
+
+        # Publish once so the channel menu exists before the storm
+        await admin_flow(api, admin_ids[0], 0, args.timeout)
+
+        stop_admins = asyncio.Event()
+        admins = asyncio.create_task(
+            run_admins(api, admin_ids[:args.admins], stop_admins, args.timeout, flow_durations)
+        )
+
+        for rate in args.rates:
+            stage = await run_stage(api, rate, args.stage_duration, item_ids, args.timeout)
+            stages.append(stage)
+            print(
+                f"offered {stage['offered_rate']:>6}/s  achieved {stage['achieved_rate']:>7}/s  "
+                f"p50 {stage['p50_ms']} ms  p99 {stage['p99_ms']} ms  timed out {stage['timed_out']}",
+                file=sys.stderr
+            )
+            if stage['timed_out'] and args.stop_on_saturation:
+                break
+
+        stop_admins.set()
+        await admins
+    finally:
+        await stop_bot(process)
+        log.close()
+        await runner.cleanup()
+
+    saturated = next(
+        (stage['offered_rate'] for stage in stages
+         if stage['achieved_rate'] < stage['offered_rate'] * SATURATION_RATIO or stage['timed_out']),
+        None
+    )
+    completed_flows = sorted(duration for duration in flow_durations if duration is not None)
+
+    report = {
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'mode': args.mode,
+        'stage_duration': args.stage_duration,
+        'admins': args.admins,
+        'overrides': overrides,
+        'stages': stages,
+        'max_sustained_rate': max(
+            (stage['achieved_rate'] for stage in stages if stage['offered_rate'] != saturated), default=None
+        ),
+        'saturated_at': saturated,
+        'admin_flows': {
+            'completed': len(completed_flows),
+            'failed': len(flow_durations) - len(completed_flows),
+            'p50_ms': round(percentile(completed_flows, 0.50) * 1000, 2) if completed_flows else None,
+            'p99_ms': round(percentile(completed_flows, 0.99) * 1000, 2) if completed_flows else None,
+        },
+        'api': api.stats(),
+        'bot_log': os.path.join(work_dir, 'bot.log'),
+    }
+    if wrong_secret_status is not None:
+        report['webhook_wrong_secret_status'] = wrong_secret_status
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test main.py against a fake Bot API.")
+    parser.add_argument('--rates', type=float, nargs='+', default=list(DEFAULT_RATES),
+                        help="offered menu clicks per second, one stage each")
+    parser.add_argument('--stage-duration', type=float, default=5, help="seconds per stage")
+    parser.add_argument('--admins', type=int, default=3, help="admins running FSM flows concurrently")
+    parser.add_argument('--timeout', type=float, default=30, help="seconds to wait for an answer")
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--mode', choices=('polling', 'webhook'), default='polling',
+                        help="how the bot receives updates from the fake API")
+    parser.add_argument('--webhook-port', type=int, default=8082, help="port of the bot's webhook server")
+    parser.add_argument('--flood-limit', type=float, help="fake API requests per second before 429")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of fake API requests answered with 429")
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                        help="extra environment for main.py, e.g. RATE_LIMIT_GLOBAL=1000")
+    parser.add_argument('--stop-on-saturation', action='store_true', help="skip higher rates once updates time out")
+    parser.add_argument('--output', help="write the report as JSON to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,387 @@
+"""
+Benchmark handlers, keyboards and database methods against a fake Bot API.
+
+Usage:
+    python -m benchmarks.run [--sizes 10 100 1000] [--iterations 200]
+                             [--output results.json] [--compare baseline.json]
+
+Every case runs the real routers from ``bot.handlers`` through a Dispatcher on
+a temporary SQLite file; results are written as JSON so runs can be compared.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+# Point the bot at a throwaway database and a fake channel before config is imported
+BENCH_DIR = tempfile.mkdtemp(prefix="menu_bot_bench_")
+ADMIN_ID = 1000
+USER_ID = 2000
+CHANNEL = "@benchmark_channel"
+os.environ["DB_PATH"] = os.path.join(BENCH_DIR, "bench.db")
+os.environ["ADMIN_IDS"] = str(ADMIN_ID)
+os.environ["CHANNEL_ID"] = CHANNEL
+os.environ["CHANNEL_IDS"] = CHANNEL
+os.environ["AUTO_PUBLISH"] = "false"
+
+from aiogram import Dispatcher  # noqa: E402
+from aiogram.types import CallbackQuery, Chat, Message, Update, User  # noqa: E402
+
+from benchmarks.fake_bot import create_fake_bot  # noqa: E402
+from bot import admin_router, user_router  # noqa: E402
+from bot.keyboards import DEFAULT_LAYOUT, dump_layout, get_channel_menu_keyboard  # noqa: E402
+from bot.keyboards import menu_kb  # noqa: E402
+from bot.utils.fsm_storage import SQLiteStorage  # noqa: E402
+from config import DB_PATH  # noqa: E402
+from database import Database  # noqa: E402
+
+DEFAULT_SIZES = (10, 100, 1000)
+DEFAULT_ITERATIONS = 200
+WARMUP_ITERATIONS = 5
+ALLOC_ITERATIONS = 20
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def measure(fn, iterations, setup=None):
+    """
+    Time ``fn`` and trace its allocations.
+
+    Args:
+        fn: Coroutine function under test
+        iterations: Timed calls
+        setup: Optional coroutine function awaited before every call, untimed
+
+    Returns:
+        dict: Latency percentiles in milliseconds and allocations in KiB
+    """
+    async def call():
+        if setup is not None:
+            await setup()
+        started = time.perf_counter()
+        await fn()
+        return time.perf_counter() - started
+
+    for _ in range(WARMUP_ITERATIONS):
+        await call()
+
+    timings = sorted([await call() for _ in range(iterations)])
+
+    peaks = []
+    allocated = []
+    tracemalloc.start()
+    try:
+        for _ in range(ALLOC_ITERATIONS):
+            if setup is not None:
+                await setup()
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            await fn()
+            after, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            allocated.append(after - before)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'iterations': iterations,
+        'p50_ms': round(percentile(timings, 0.50) * 1000, 4),
+        'p99_ms': round(percentile(timings, 0.99) * 1000, 4),
+        'mean_ms': round(statistics.fmean(timings) * 1000, 4),
+        'max_ms': round(timings[-1] * 1000, 4),
+        'alloc_peak_kib': round(max(peaks) / 1024, 2),
+        'alloc_retained_kib': round(statistics.fmean(allocated) / 1024, 2)
+    }
+
+
+def build_menu(size):
+    """Build ``size`` menu rows: a third dynamic price items, the rest info items and one contact."""
+    items, contents, price_posts = [], [], []
+    for item_id in range(1, size + 1):
+        if item_id == size:
+            items.append((item_id, 'contact', f"Контакт {item_id}", '@benchmark_manager', item_id, False))
+        elif item_id % 3 == 1:
+            items.append((item_id, 'price', f"Прайс {item_id}", None, item_id, True))
+            for version in range(3):
+                price_posts.append((item_id, f"https://t.me/benchmark/{item_id * 10 + version}", None))
+        else:
+            items.append((item_id, 'info', f"Информация {item_id}", None, item_id, False))
+            contents.append((item_id, f"Ответ для пункта {item_id}"))
+    return items, contents, price_posts
+
+
+def build_callback_update(update_id, user_id, data):
+    """Build an Update with a callback query from ``user_id`` on a bot message."""
+    user = User(id=user_id, is_bot=False, first_name="Bench")
+    message = Message(
+        message_id=1,
+        date=datetime.now(timezone.utc),
+        chat=Chat(id=user_id, type='private'),
+        text="benchmark"
+    )
+    return Update(
+        update_id=update_id,
+        callback_query=CallbackQuery(
+            id=str(update_id), from_user=user, chat_instance="bench", message=message, data=data
+        )
+    )
+
+
+async def reset_database(db, size):
+    """Recreate the benchmark database file with a menu of ``size`` items."""
+    await db.close()
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(DB_PATH + suffix):
+            os.remove(DB_PATH + suffix)
+
+    await db.create_tables()
+    await db.replace_menu(*build_menu(size))
+
+    # A few days of clicks so the statistics paths have rollups to read
+    now = int(time.time())
+    await db.insert_events([
+        ('click', 1 + n % size, USER_ID, now - n * 60) for n in range(size * 10)
+    ])
+    await db.refresh_rollups()
+
+
+def create_dispatcher(db):
+    """Create a Dispatcher with the real routers, set up like the one in main.py."""
+    dp = Dispatcher(storage=SQLiteStorage(db))
+    dp.include_router(user_router)
+    dp.include_router(admin_router)
+    return dp
+
+
+async def bench_handlers(dp, bot, db, size, iterations):
+    """Benchmark the handler paths through a Dispatcher with the real routers."""
+    bot.session.calls.clear()
+    update_ids = iter(range(1, 10 ** 9))
+    info_id = 2 if size > 2 else 1
+
+    def feed(user_id, data):
+        async def run():
+            await dp.feed_update(bot, build_callback_update(next(update_ids), user_id, data))
+        return run
+
+    async def forget_published_hash():
+        config = await db.get_menu_config(CHANNEL)
+        if config:
+            await db.update_menu_config(config['menu_message_id'], CHANNEL, config['is_pinned'], None)
+
+    async def cold_keyboard():
+        menu_kb._compiled_keyboards.clear()
+
+    async def channel_keyboard():
+        await get_channel_menu_keyboard((await db.get_menu_snapshot()).items)
+
+    cases = {
+        'publish_menu': (feed(ADMIN_ID, "publish_menu"), None),
+        'confirm_publish': (feed(ADMIN_ID, "confirm_publish"), forget_published_hash),
+        'confirm_publish[unchanged]': (feed(ADMIN_ID, "confirm_publish"), None),
+        'show_statistics': (feed(ADMIN_ID, "statistics"), None),
+        'handle_menu_item_click': (feed(USER_ID, f"menu_item:{info_id}"), None),
+        'get_channel_menu_keyboard': (channel_keyboard, None),
+        'get_channel_menu_keyboard[cold]': (channel_keyboard, cold_keyboard),
+    }
+
+    results = {name: await measure(fn, iterations, setup) for name, (fn, setup) in cases.items()}
+    results['_bot_api_calls'] = dict(bot.session.calls)
+    return results
+
+
+async def bench_database(db, size, iterations):
+    """Benchmark every public Database method on a menu of ``size`` items."""
+    price_id = 1
+    info_id = 2 if size > 2 else 1
+    menu = build_menu(size)
+    info_ids = [item[0] for item in menu[0] if item[1] == 'info']
+    # Deep keyset pages: the middle of the info items and the last one
+    middle = (info_ids[len(info_ids) // 2], info_ids[len(info_ids) // 2]) if info_ids else (0, 0)
+    last_info_id = info_ids[-1] if info_ids else info_id
+    layout = dump_layout(DEFAULT_LAYOUT)
+    granted_id = USER_ID + 1
+    created = []
+    events = [('click', 1 + n % size, USER_ID, int(time.time())) for n in range(100)]
+
+    async def add_item():
+        created.append(await db.add_menu_item('info', "Новый пункт", None, size + 1, False))
+
+    async def ensure_created():
+        if not created:
+            await add_item()
+
+    async def queue_events():
+        await db.insert_events(events)
+
+    async def invalidate_cache():
+        db.cache.invalidate()
+
+    async def store_layout():
+        await db.set_menu_layout(CHANNEL, layout)
+
+    async def grant_admin():
+        await db.add_admin(granted_id, ADMIN_ID)
+
+    async def revoke_admin():
+        await db.remove_admin(granted_id)
+
+    cases = {
+        'create_tables': (db.create_tables, None),
+        'get_menu_config': (lambda: db.get_menu_config(CHANNEL), None),
+        'get_menu_configs': (db.get_menu_configs, None),
+        'update_menu_config': (lambda: db.update_menu_config(1, CHANNEL, True, 'hash'), None),
+        'get_menu_items': (db.get_menu_items, None),
+        'get_menu_items[dynamic_only]': (lambda: db.get_menu_items(dynamic_only=True), None),
+        'get_menu_items_page': (lambda: db.get_menu_items_page('info'), None),
+        'get_menu_items_page[middle]': (lambda: db.get_menu_items_page('info', middle), None),
+        'get_menu_items_page[middle,backward]': (
+            lambda: db.get_menu_items_page('info', middle, backward=True), None
+        ),
+        'get_menu_items_page_at[last]': (lambda: db.get_menu_items_page_at(last_info_id), None),
+        'get_menu_layout': (lambda: db.get_menu_layout(CHANNEL), store_layout),
+        'get_menu_layouts': (db.get_menu_layouts, None),
+        'set_menu_layout': (store_layout, None),
+        'delete_menu_layout': (lambda: db.delete_menu_layout(CHANNEL), store_layout),
+        'get_menu_snapshot': (db.get_menu_snapshot, None),
+        'get_menu_snapshot[cold]': (db.get_menu_snapshot, invalidate_cache),
+        'get_menu_item': (lambda: db.get_menu_item(info_id), None),
+        'get_item_content': (lambda: db.get_item_content(info_id), None),
+        'set_item_content': (lambda: db.set_item_content(info_id, "Обновленный ответ"), None),
+        'update_menu_item': (lambda: db.update_menu_item(info_id, url="https://t.me/benchmark/1"), None),
+        'get_price_post': (lambda: db.get_price_post(price_id), None),
+        'get_price_history': (lambda: db.get_price_history(price_id), None),
+        'update_price_post': (lambda: db.update_price_post(price_id, "https://t.me/benchmark/2"), None),
+        'compact_price_posts': (db.compact_price_posts, None),
+        'export_menu': (db.export_menu, None),
+        'replace_menu': (lambda: db.replace_menu(*menu), None),
+        'initialize_default_menu': (db.initialize_default_menu, None),
+        'seed_item_content': (db.seed_item_content, None),
+        'get_admins': (db.get_admins, None),
+        'add_admin': (grant_admin, revoke_admin),
+        'remove_admin': (revoke_admin, grant_admin),
+        'get_fsm_record': (lambda: db.get_fsm_record("bench"), None),
+        'save_fsm_records': (lambda: db.save_fsm_records([("bench", "State:x", '{"a": 1}')]), None),
+        'insert_events[100]': (lambda: db.insert_events(events), None),
+        'refresh_rollups[100]': (db.refresh_rollups, queue_events),
+        'get_click_counts': (db.get_click_counts, None),
+        'get_click_counts[7d]': (lambda: db.get_click_counts(7), None),
+        'get_event_totals[7d]': (lambda: db.get_event_totals(7), None),
+        'get_hourly_histogram[7d]': (lambda: db.get_hourly_histogram(7), None),
+        'add_menu_item': (add_item, None),
+        'delete_menu_item': (lambda: db.delete_menu_item(created.pop()), ensure_created),
+    }
+
+    return {name: await measure(fn, iterations, setup) for name, (fn, setup) in cases.items()}
+
+
+def git_revision():
+    """Get the current commit hash, if the benchmarks run from a git checkout."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(sizes, iterations):
+    """Run every benchmark at every menu size."""
+    db = Database()
+    bot = create_fake_bot()
+    dp = create_dispatcher(db)
+    results = {}
+    try:
+        for size in sizes:
+            print(f"menu size {size}...", file=sys.stderr)
+            await reset_database(db, size)
+            results[str(size)] = {
+                'handlers': await bench_handlers(dp, bot, db, size, iterations),
+                'database': await bench_database(db, size, iterations)
+            }
+    finally:
+        await dp.storage.close()
+        await bot.session.close()
+        await db.close()
+
+    return {
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'iterations': iterations,
+        'sizes': results
+    }
+
+
+def iter_cases(report):
+    """Yield (size, group, case, stats) for every measured case in a report."""
+    for size, groups in report['sizes'].items():
+        for group, cases in groups.items():
+            for case, stats in cases.items():
+                if not case.startswith('_'):
+                    yield size, group, case, stats
+
+
+def print_report(report, baseline=None):
+    """Print a table of results, with the p50 change against ``baseline`` if given."""
+    previous = {}
+    if baseline is not None:
+        previous = {(size, group, case): stats for size, group, case, stats in iter_cases(baseline)}
+
+    print(f"{'size':>5}  {'case':<42} {'p50 ms':>9} {'p99 ms':>9} {'peak KiB':>9}", end="")
+    print(f" {'Δp50':>8}" if previous else "")
+    for size, group, case, stats in iter_cases(report):
+        line = (
+            f"{size:>5}  {group[:2] + ':' + case:<42} {stats['p50_ms']:>9.3f} "
+            f"{stats['p99_ms']:>9.3f} {stats['alloc_peak_kib']:>9.1f}"
+        )
+        old = previous.get((size, group, case))
+        if old and old['p50_ms']:
+            line += f" {(stats['p50_ms'] / old['p50_ms'] - 1) * 100:>+7.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the menu bot against a fake Bot API.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help="menu sizes to test")
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS, help="timed calls per case")
+    parser.add_argument('--output', help="result file, defaults to benchmarks/results/<timestamp>.json")
+    parser.add_argument('--compare', help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.sizes, args.iterations))
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print_report(report, baseline)
+    print(f"\nResults written to {output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""
+Callback data codecs and the prefix dispatch table routing callback queries.
+
+Every button's callback data is ``prefix`` or ``prefix:arg``, built and parsed
+by the CallbackData classes below. The prefixes match the strings used before
+the codecs existed, so buttons on already published channel menus keep working.
+"""
+from aiogram.dispatcher.event.handler import CallableObject, FilterObject, HandlerObject
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import CallbackQuery
+
+SEPARATOR = ":"
+
+
+# Channel menu
+class MenuItemCallback(CallbackData, prefix="menu_item"):
+    item_id: int
+
+
+# Admin panel navigation
+class BackToAdminCallback(CallbackData, prefix="back_to_admin"):
+    pass
+
+
+class PublishMenuCallback(CallbackData, prefix="publish_menu"):
+    pass
+
+
+class UpdatePricesCallback(CallbackData, prefix="update_prices"):
+    pass
+
+
+class UpdatePriceCallback(CallbackData, prefix="update_price"):
+    price_type: str
+
+
+class PriceHistoryCallback(CallbackData, prefix="price_history"):
+    price_type: str
+
+
+class MenuSettingsCallback(CallbackData, prefix="menu_settings"):
+    pass
+
+
+class TogglePinCallback(CallbackData, prefix="toggle_pin"):
+    pass
+
+
+class RefreshMenuCallback(CallbackData, prefix="refresh_menu"):
+    pass
+
+
+class StaticItemsCallback(CallbackData, prefix="static_items"):
+    pass
+
+
+class StaticItemsPageCallback(CallbackData, prefix="static_page"):
+    # Keyset cursor: the page starts after (position, item_id), or ends before it when backward
+    position: int
+    item_id: int
+    backward: bool
+
+
+class UpdateStaticCallback(CallbackData, prefix="update_static"):
+    item_id: int
+
+
+class EditContentCallback(CallbackData, prefix="edit_content"):
+    item_id: int
+
+
+class StatisticsCallback(CallbackData, prefix="statistics"):
+    pass
+
+
+class StatsPeriodCallback(CallbackData, prefix="stats"):
+    days: int
+
+
+class CancelCallback(CallbackData, prefix="cancel"):
+    pass
+
+
+# Confirmation buttons
+class ConfirmPublishCallback(CallbackData, prefix="confirm_publish"):
+    pass
+
+
+class ConfirmRefreshCallback(CallbackData, prefix="confirm_refresh"):
+    pass
+
+
+class ConfirmUpdateUrlCallback(CallbackData, prefix="confirm_update_url"):
+    pass
+
+
+class ConfirmUpdateItemContentCallback(CallbackData, prefix="confirm_update_item_content"):
+    pass
+
+
+class ConfirmUpdateStaticUrlCallback(CallbackData, prefix="confirm_update_static_url"):
+    pass
+
+
+class ConfirmImportCallback(CallbackData, prefix="confirm_import"):
+    pass
+
+
+class CallbackTable:
+    """
+    Prefix dispatch table for a router's callback queries.
+
+    The router gets a single callback_query handler. Its filter looks the
+    callback data prefix up in a dict and checks only that route's own filters
+    (e.g. an FSM state), instead of trying every handler's filters in turn.
+    Routed handlers receive the unpacked codec as ``callback_data`` and are
+    exposed as ``handler`` to inner middlewares, the same as regular handlers.
+
+    Callback queries without a matching route are left unhandled, so they
+    propagate to the next router.
+    """
+
+    def __init__(self, router):
+        self.routes = {}
+        router.callback_query.register(self._dispatch, self._resolve)
+
+    def __call__(self, codec, *filters):
+        """Decorator routing callback data of ``codec`` to the handler."""
+        prefix = codec.__prefix__
+        if prefix in self.routes:
+            raise ValueError(f"callback prefix {prefix!r} is already routed")
+
+        def wrapper(callback):
+            handler = HandlerObject(callback=callback, filters=[FilterObject(f) for f in filters])
+            self.routes[prefix] = (codec, handler)
+            return callback
+
+        return wrapper
+
+    async def _resolve(self, callback: CallbackQuery, **kwargs):
+        data = callback.data
+        if not data:
+            return False
+        route = self.routes.get(data.partition(SEPARATOR)[0])
+        if route is None:
+            return False
+
+        codec, handler = route
+        try:
+            callback_data = codec.unpack(data)
+        except (TypeError, ValueError):
+            return False
+
+        if not handler.filters:
+            return {'handler': handler, 'callback_data': callback_data}
+
+        passed, kwargs = await handler.check(callback, **kwargs)
+        if not passed:
+            return False
+        kwargs.update(handler=handler, callback_data=callback_data)
+        return kwargs
+
+    @staticmethod
+    async def _dispatch(callback: CallbackQuery, handler: CallableObject, **kwargs):
+        return await handler.call(callback, **kwargs)
@@ -1,9 +1,39 @@
+import asyncio
+import html
+import json
+import secrets
+from datetime import datetime
+
 from aiogram import Router, F
-from aiogram.types import Message, CallbackQuery
-from aiogram.filters import Command, StateFilter
+from aiogram.types import Message, CallbackQuery, BufferedInputFile, FSInputFile
+from aiogram.filters import Command, CommandObject, StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
+from bot.callbacks import (
+    BackToAdminCallback,
+    CallbackTable,
+    CancelCallback,
+    ConfirmImportCallback,
+    ConfirmPublishCallback,
+    ConfirmRefreshCallback,
+    ConfirmUpdateItemContentCallback,
+    ConfirmUpdateStaticUrlCallback,
+    ConfirmUpdateUrlCallback,
+    EditContentCallback,
+    MenuSettingsCallback,
+    PriceHistoryCallback,
+    PublishMenuCallback,
+    RefreshMenuCallback,
+    StaticItemsCallback,
+    StaticItemsPageCallback,
+    StatisticsCallback,
+    StatsPeriodCallback,
+    TogglePinCallback,
+    UpdatePriceCallback,
+    UpdatePricesCallback,
+    UpdateStaticCallback
+)
 from bot.keyboards import (
     get_admin_main_keyboard, 
     get_price_update_keyboard, 
@@ -11,35 +41,91 @@ from bot.keyboards import (
     get_confirmation_keyboard, 
     get_back_keyboard, 
     get_static_items_keyboard,
-    get_channel_menu_keyboard
+    get_static_item_keyboard,
+    get_statistics_keyboard,
+    get_price_url_keyboard,
+    DEFAULT_LAYOUT,
+    LayoutError,
+    dump_layout,
+    parse_layout
+)
+from bot.utils.analytics import analytics, EVENT_CLICK, EVENT_PUBLISH
+from bot.utils.admins import IsAdmin, admins
+from bot.utils.autopublish import auto_publisher
+from bot.utils.menu_io import (
+    MenuImportError,
+    diff_menu_document,
+    dump_menu_document,
+    export_menu_document,
+    parse_menu_document
 )
+from bot.utils.profiling import profiler, slow_log
+from bot.utils.publisher import publish_menu_to_channels
 from database import Database
-from config import ADMIN_IDS, CHANNEL_ID
+from database.defaults import MAX_ITEM_CONTENT_LENGTH
+from config import CHANNEL_IDS, PROFILE_MAX_SECONDS
 
-# Initialize router
+# Initialize router; only admins' updates reach its handlers
 router = Router()
+router.message.filter(IsAdmin())
+router.callback_query.filter(IsAdmin())
+callbacks = CallbackTable(router)
 
 # States for admin actions
 class AdminStates(StatesGroup):
     waiting_for_price_url = State()
     waiting_for_static_url = State()
+    waiting_for_item_content = State()
+    waiting_for_import_file = State()
     waiting_for_confirmation = State()
 
 
-# Middleware to check admin permissions
-@router.message.middleware()
-@router.callback_query.middleware()
-async def admin_middleware(handler, event, data):
-    user_id = event.from_user.id
-    
-    if user_id not in ADMIN_IDS:
-        if isinstance(event, Message):
-            await event.answer("⛔ У вас нет доступа к этой команде.")
-        elif isinstance(event, CallbackQuery):
-            await event.answer("⛔ У вас нет доступа к этой функции.", show_alert=True)
-        return
-    
-    return await handler(event, data)
+# Commands served by this router, answered with a refusal for everyone else
+ADMIN_COMMANDS = ("admin", "export", "import", "stats", "layout", "profile", "slowlog", "admins", "grant", "revoke")
+
+
+# Price list types selectable in the admin panel: (title, position)
+PRICE_TYPES = {
+    "new_iphone": ("📱 Прайс на НОВЫЕ iPhone 📱", 1),
+    "used_iphone": ("📱 Прайс на Б/У iPhone 📱", 2),
+    "airpods_watch": ("🎧 Прайс на AirPods и Apple Watch ⌚", 3)
+}
+
+# Largest menu document accepted by /import
+MAX_IMPORT_FILE_SIZE = 1024 * 1024
+
+# Diff lines shown before an import is confirmed
+MAX_IMPORT_DIFF_LINES = 30
+
+# Updates listed by /slowlog
+SLOWLOG_LIMIT = 15
+
+# Menu item type managed on the static items screen
+STATIC_ITEM_TYPE = 'info'
+
+STATIC_ITEMS_TEXT = (
+    "📄 <b>Управление статическими пунктами меню</b>\n\n"
+    "Выберите пункт для настройки URL:\n"
+    "✅ - URL установлен\n"
+    "❌ - URL не установлен"
+)
+
+# Typographic quotes some Telegram clients substitute while typing JSON
+SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "„": '"', "«": '"', "»": '"'})
+
+# Profiling windows run in the background; keep references so they aren't garbage collected
+_background_tasks = set()
+
+# Parsed import documents awaiting confirmation, by admin: (token, MenuDocument).
+# FSM data keeps only the token, documents can be up to MAX_IMPORT_FILE_SIZE.
+_pending_imports = {}
+
+
+def get_publish_hint(auto_published):
+    """Get the note telling the admin how menu changes reach the channel."""
+    if auto_published:
+        return "Меню в канале обновится автоматически в течение нескольких секунд."
+    return "Не забудьте опубликовать меню в канал, чтобы изменения вступили в силу."
 
 
 # Command handlers
@@ -54,7 +140,7 @@ async def cmd_admin(message: Message):
 
 
 # Callback query handlers
-@router.callback_query(F.data == "back_to_admin")
+@callbacks(BackToAdminCallback)
 async def back_to_admin(callback: CallbackQuery):
     """Handle back button to return to admin panel."""
     await callback.message.edit_text(
@@ -65,13 +151,13 @@ async def back_to_admin(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data == "publish_menu")
+@callbacks(PublishMenuCallback)
 async def publish_menu(callback: CallbackQuery):
     """Handle menu publication request."""
     db = Database()
     
-    # Get all menu items
-    menu_items = await db.get_menu_items()
+    # Get all menu items with their current price URLs
+    menu_items = (await db.get_menu_snapshot()).items
     
     if not menu_items:
         await callback.message.edit_text(
@@ -82,16 +168,6 @@ async def publish_menu(callback: CallbackQuery):
         await callback.answer()
         return
     
-    # Update dynamic price URLs
-    menu_items = [dict(item) for item in menu_items]  # Convert all rows to dicts first
-    for item in menu_items:
-        if item['is_dynamic']:
-            price_post = await db.get_price_post(item['id'])
-            if price_post:
-                # Convert price_post to dict before accessing it
-                price_post_dict = dict(price_post)
-                item['url'] = price_post_dict['post_url']
-    
     # Generate preview text
     preview_text = "📋 <b>Предпросмотр меню</b>\n\n"
     
@@ -107,91 +183,55 @@ async def publish_menu(callback: CallbackQuery):
     
     await callback.message.edit_text(
         preview_text,
-        reply_markup=get_confirmation_keyboard("publish")
+        reply_markup=get_confirmation_keyboard(ConfirmPublishCallback)
     )
     await callback.answer()
 
 
-@router.callback_query(F.data == "confirm_publish")
+@callbacks(ConfirmPublishCallback)
 async def confirm_publish(callback: CallbackQuery, state: FSMContext):
     """Handle confirmation of menu publication."""
+    await publish_to_channels(callback)
+
+
+async def publish_to_channels(callback: CallbackQuery, force=False):
+    """Publish the menu to every channel and report the outcome per channel to the admin."""
     db = Database()
     
     try:
-        # Get all menu items
-        menu_items = await db.get_menu_items()
-        
-        # Update dynamic price URLs
-        menu_items = [dict(item) for item in menu_items]  # Convert all rows to dicts first
-        for item in menu_items:
-            if item['is_dynamic']:
-                price_post = await db.get_price_post(item['id'])
-                if price_post:
-                    # Convert price_post to dict before accessing it
-                    price_post_dict = dict(price_post)
-                    item['url'] = price_post_dict['post_url']
+        # Get all menu items with their current price URLs
+        menu_items = (await db.get_menu_snapshot()).items
         
-        # Generate menu text
-        menu_text = "🛍️ <b>АКТУАЛЬНЫЕ ЦЕНЫ</b> 🛍️\n\n"
-        menu_text += "Выберите интересующий вас раздел:"
+        # Send or edit message in every channel
+        results = await publish_menu_to_channels(callback.bot, db, menu_items, force=force)
         
-        # Create inline keyboard
-        keyboard = await get_channel_menu_keyboard(menu_items)
-        
-        # Get existing menu config
-        config = await db.get_menu_config()
-        
-        # Send or edit message in channel
-        bot = callback.bot
-        
-        if config and config['menu_message_id']:
-            try:
-                # Try to edit existing message
-                message = await bot.edit_message_text(
-                    chat_id=config['channel_id'] or CHANNEL_ID,
-                    message_id=config['menu_message_id'],
-                    text=menu_text,
-                    reply_markup=keyboard
-                )
-                is_new = False
-            except Exception:
-                # If edit fails, send new message
-                message = await bot.send_message(
-                    chat_id=CHANNEL_ID,
-                    text=menu_text,
-                    reply_markup=keyboard
-                )
-                is_new = True
-        else:
-            # Send new message
-            message = await bot.send_message(
-                chat_id=CHANNEL_ID,
-                text=menu_text,
-                reply_markup=keyboard
+        if not results:
+            await callback.message.edit_text(
+                "❌ <b>Ошибка</b>\n\n"
+                "Не настроен ни один канал для публикации (CHANNEL_ID / CHANNEL_IDS).",
+                reply_markup=get_back_keyboard()
             )
-            is_new = True
+            await callback.answer()
+            return
         
-        # Pin message if needed
-        is_pinned = config['is_pinned'] if config else True
-        if is_pinned and is_new:
-            await bot.pin_chat_message(
-                chat_id=CHANNEL_ID,
-                message_id=message.message_id,
-                disable_notification=True
-            )
-        
-        # Update config in database
-        await db.update_menu_config(
-            message_id=message.message_id,
-            channel_id=CHANNEL_ID,
-            is_pinned=is_pinned
-        )
+        # Notify admin with a line per channel
+        result_text = "📢 <b>Публикация меню</b>\n\n"
+        for result in results:
+            channel = html.escape(str(result.channel_id))
+            if result.error is not None:
+                status = f"❌ ошибка: {html.escape(str(result.error))}"
+            elif result.unchanged:
+                status = "✅ уже актуально"
+            else:
+                analytics.record_publish(callback.from_user.id)
+                status = (
+                    f"✅ {'обновлено' if not result.is_new else 'опубликовано'}, "
+                    f"{'закреплено' if result.is_pinned else 'не закреплено'}"
+                )
+            result_text += f"• <code>{channel}</code>: {status} ({result.latency * 1000:.0f} мс)\n"
         
-        # Notify admin
         await callback.message.edit_text(
-            "✅ <b>Успешно!</b>\n\n"
-            f"Меню {'обновлено' if not is_new else 'опубликовано'} в канале "
-            f"и {'закреплено' if is_pinned else 'не закреплено'}.",
+            result_text,
             reply_markup=get_back_keyboard()
         )
     
@@ -206,7 +246,7 @@ async def confirm_publish(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data == "update_prices")
+@callbacks(UpdatePricesCallback)
 async def update_prices(callback: CallbackQuery):
     """Handle price update request."""
     await callback.message.edit_text(
@@ -217,19 +257,13 @@ async def update_prices(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("update_price:"))
-async def select_price_to_update(callback: CallbackQuery, state: FSMContext):
+@callbacks(UpdatePriceCallback)
+async def select_price_to_update(callback: CallbackQuery, state: FSMContext, callback_data: UpdatePriceCallback):
     """Handle selection of price list to update."""
-    price_type = callback.data.split(":")[1]
+    price_type = callback_data.price_type
     
     # Map price type to database item
-    price_type_map = {
-        "new_iphone": ("📱 Прайс на НОВЫЕ iPhone 📱", 1),
-        "used_iphone": ("📱 Прайс на Б/У iPhone 📱", 2),
-        "airpods_watch": ("🎧 Прайс на AirPods и Apple Watch ⌚", 3)
-    }
-    
-    title, position = price_type_map.get(price_type, ("Неизвестный прайс", 0))
+    title, position = PRICE_TYPES.get(price_type, ("Неизвестный прайс", 0))
     
     # Store the selected price type in state
     await state.update_data(price_type=price_type, position=position, title=title)
@@ -239,14 +273,13 @@ async def select_price_to_update(callback: CallbackQuery, state: FSMContext):
     
     # Get current URL if exists
     db = Database()
-    menu_items = await db.get_menu_items(dynamic_only=True)
+    menu_items = (await db.get_menu_snapshot()).items
     
     current_url = "Не установлен"
     for item in menu_items:
-        if item['title'] == title:
-            price_post = await db.get_price_post(item['id'])
-            if price_post and price_post['post_url']:
-                current_url = price_post['post_url']
+        if item['is_dynamic'] and item['title'] == title:
+            if item['price_url']:
+                current_url = item['price_url']
             break
     
     await callback.message.edit_text(
@@ -255,7 +288,33 @@ async def select_price_to_update(callback: CallbackQuery, state: FSMContext):
         f"Текущая ссылка: <code>{current_url}</code>\n\n"
         f"Пришлите новую ссылку на пост с прайс-листом.\n"
         f"Ссылка должна быть в формате: <code>https://t.me/channel/123</code>",
-        reply_markup=get_back_keyboard()
+        reply_markup=get_price_url_keyboard(price_type)
+    )
+    await callback.answer()
+
+
+@callbacks(PriceHistoryCallback)
+async def show_price_history(callback: CallbackQuery, callback_data: PriceHistoryCallback):
+    """Handle request for the link history of a price list."""
+    price_type = callback_data.price_type
+    title, _ = PRICE_TYPES.get(price_type, ("Неизвестный прайс", 0))
+    
+    db = Database()
+    menu_items = (await db.get_menu_snapshot()).items
+    item = next((item for item in menu_items if item['is_dynamic'] and item['title'] == title), None)
+    history = await db.get_price_history(item['id']) if item else []
+    
+    history_text = f"🕘 <b>История ссылок</b>\n\nПрайс-лист: <b>{title}</b>\n\n"
+    history_links = [post for post in history if post['post_url']]
+    if history_links:
+        for post in history_links:
+            history_text += f"• {post['updated_at']} — <code>{post['post_url']}</code>\n"
+    else:
+        history_text += "Ссылки еще не устанавливались."
+    
+    await callback.message.edit_text(
+        history_text,
+        reply_markup=get_price_url_keyboard(price_type)
     )
     await callback.answer()
 
@@ -285,7 +344,7 @@ async def process_price_url(message: Message, state: FSMContext):
         f"Прайс-лист: <b>{title}</b>\n"
         f"Новая ссылка: <code>{url}</code>\n\n"
         f"Подтвердите обновление:",
-        reply_markup=get_confirmation_keyboard("update_url")
+        reply_markup=get_confirmation_keyboard(ConfirmUpdateUrlCallback)
     )
     
     # Update state with URL
@@ -293,7 +352,7 @@ async def process_price_url(message: Message, state: FSMContext):
     await state.set_state(AdminStates.waiting_for_confirmation)
 
 
-@router.callback_query(AdminStates.waiting_for_confirmation, F.data == "confirm_update_url")
+@callbacks(ConfirmUpdateUrlCallback, AdminStates.waiting_for_confirmation)
 async def confirm_update_url(callback: CallbackQuery, state: FSMContext):
     """Handle confirmation of price URL update."""
     # Get data from state
@@ -305,11 +364,11 @@ async def confirm_update_url(callback: CallbackQuery, state: FSMContext):
     
     try:
         # Find the menu item by title
-        menu_items = await db.get_menu_items(dynamic_only=True)
+        menu_items = (await db.get_menu_snapshot()).items
         item_id = None
         
         for item in menu_items:
-            if item['title'] == title:
+            if item['is_dynamic'] and item['title'] == title:
                 item_id = item['id']
                 break
         
@@ -333,7 +392,7 @@ async def confirm_update_url(callback: CallbackQuery, state: FSMContext):
         await callback.message.edit_text(
             "✅ <b>Успешно!</b>\n\n"
             f"Прайс-лист <b>{title}</b> обновлен.\n\n"
-            "Не забудьте опубликовать меню в канал, чтобы изменения вступили в силу.",
+            f"{get_publish_hint(auto_publisher.notify_changed())}",
             reply_markup=get_admin_main_keyboard()
         )
     
@@ -348,7 +407,7 @@ async def confirm_update_url(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data == "menu_settings")
+@callbacks(MenuSettingsCallback)
 async def menu_settings(callback: CallbackQuery):
     """Handle menu settings request."""
     await callback.message.edit_text(
@@ -359,13 +418,16 @@ async def menu_settings(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data == "toggle_pin")
+@callbacks(TogglePinCallback)
 async def toggle_pin(callback: CallbackQuery):
     """Handle pin/unpin toggle request."""
     db = Database()
-    config = await db.get_menu_config()
-    
-    if not config or not config['menu_message_id']:
+    # Only the configured channels, in config order; stale rows of removed channels are left alone
+    stored = {config['channel_id']: config for config in await db.get_menu_configs()}
+    configs = [stored[channel_id] for channel_id in CHANNEL_IDS
+               if channel_id in stored and stored[channel_id]['menu_message_id']]
+
+    if not configs:
         await callback.message.edit_text(
             "❌ <b>Ошибка</b>\n\n"
             "Меню еще не опубликовано в канале.",
@@ -374,74 +436,88 @@ async def toggle_pin(callback: CallbackQuery):
         await callback.answer()
         return
     
-    # Toggle pin status
-    new_pin_status = not config['is_pinned']
+    # Toggle pin status in every channel, following the first one
+    new_pin_status = not configs[0]['is_pinned']
+    pin_text = "закреплено" if new_pin_status else "откреплено"
+    failed = []
     
-    try:
-        bot = callback.bot
-        
-        if new_pin_status:
-            # Pin message
-            await bot.pin_chat_message(
-                chat_id=config['channel_id'] or CHANNEL_ID,
+    bot = callback.bot
+    for config in configs:
+        try:
+            if new_pin_status:
+                # Pin message
+                await bot.pin_chat_message(
+                    chat_id=config['channel_id'],
+                    message_id=config['menu_message_id'],
+                    disable_notification=True
+                )
+            else:
+                # Unpin message
+                await bot.unpin_chat_message(
+                    chat_id=config['channel_id'],
+                    message_id=config['menu_message_id']
+                )
+            
+            # Update config in database
+            await db.update_menu_config(
                 message_id=config['menu_message_id'],
-                disable_notification=True
-            )
-            pin_text = "закреплено"
-        else:
-            # Unpin message
-            await bot.unpin_chat_message(
-                chat_id=config['channel_id'] or CHANNEL_ID,
-                message_id=config['menu_message_id']
+                channel_id=config['channel_id'],
+                is_pinned=new_pin_status,
+                content_hash=config['content_hash']
             )
-            pin_text = "откреплено"
-        
-        # Update config in database
-        await db.update_menu_config(
-            message_id=config['menu_message_id'],
-            channel_id=config['channel_id'] or CHANNEL_ID,
-            is_pinned=new_pin_status
-        )
-        
+        except Exception as e:
+            failed.append(f"• <code>{html.escape(config['channel_id'])}</code>: {html.escape(str(e))}")
+    
+    if not failed:
         # Show success message
         await callback.message.edit_text(
             f"✅ <b>Успешно!</b>\n\n"
             f"Меню {pin_text} в канале.",
             reply_markup=get_menu_settings_keyboard()
         )
-    
-    except Exception as e:
+    else:
         # Handle errors
         await callback.message.edit_text(
             f"❌ <b>Ошибка при изменении статуса закрепления</b>\n\n"
-            f"Детали: {str(e)}",
+            f"Детали:\n" + "\n".join(failed),
             reply_markup=get_back_keyboard()
         )
     
     await callback.answer()
 
 
-@router.callback_query(F.data == "refresh_menu")
+@callbacks(RefreshMenuCallback)
 async def refresh_menu(callback: CallbackQuery):
     """Handle menu refresh request."""
     await callback.message.edit_text(
         "🔄 <b>Обновление меню</b>\n\n"
         "Вы уверены, что хотите обновить меню в канале?",
-        reply_markup=get_confirmation_keyboard("publish")
+        reply_markup=get_confirmation_keyboard(ConfirmRefreshCallback)
     )
     await callback.answer()
 
 
-@router.callback_query(F.data == "static_items")
+@callbacks(ConfirmRefreshCallback)
+async def confirm_refresh(callback: CallbackQuery):
+    """Handle confirmation of menu refresh, reposting the menu even if it looks unchanged."""
+    await publish_to_channels(callback, force=True)
+
+
+async def get_static_items_page(db, cursor=None, backward=False):
+    """Get a page of static items, starting over from the first page if the cursor ran past the end."""
+    page = await db.get_menu_items_page(STATIC_ITEM_TYPE, cursor, backward)
+    if cursor is not None and not page.items:
+        page = await db.get_menu_items_page(STATIC_ITEM_TYPE)
+    return page
+
+
+@callbacks(StaticItemsCallback)
 async def static_items(callback: CallbackQuery):
     """Handle static items management request."""
-    db = Database()
+    # Первая страница статических пунктов меню (тип 'info')
+    page = await get_static_items_page(Database())
     
-    # Получаем все статические пункты меню (тип 'info')
-    menu_items = await db.get_menu_items()
-    static_items = [dict(item) for item in menu_items if item['type'] == 'info']
-    
-    if not static_items:
+    if not page.items:
         await callback.message.edit_text(
             "❌ <b>Ошибка</b>\n\n"
             "Статические пункты меню не найдены.",
@@ -450,24 +526,28 @@ async def static_items(callback: CallbackQuery):
         await callback.answer()
         return
     
-    await callback.message.edit_text(
-        "📄 <b>Управление статическими пунктами меню</b>\n\n"
-        "Выберите пункт для настройки URL:\n"
-        "✅ - URL установлен\n"
-        "❌ - URL не установлен",
-        reply_markup=get_static_items_keyboard(static_items)
-    )
+    await callback.message.edit_text(STATIC_ITEMS_TEXT, reply_markup=get_static_items_keyboard(page))
+    await callback.answer()
+
+
+@callbacks(StaticItemsPageCallback)
+async def static_items_page(callback: CallbackQuery, callback_data: StaticItemsPageCallback):
+    """Handle paging through static items."""
+    cursor = (callback_data.position, callback_data.item_id)
+    page = await get_static_items_page(Database(), cursor, callback_data.backward)
+    
+    await callback.message.edit_text(STATIC_ITEMS_TEXT, reply_markup=get_static_items_keyboard(page))
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("update_static:"))
-async def select_static_to_update(callback: CallbackQuery, state: FSMContext):
+@callbacks(UpdateStaticCallback)
+async def select_static_to_update(callback: CallbackQuery, state: FSMContext, callback_data: UpdateStaticCallback):
     """Handle selection of static item to update."""
-    item_id = int(callback.data.split(":")[1])
+    item_id = callback_data.item_id
     
     # Получаем информацию о выбранном пункте меню
     db = Database()
-    item = await db.get_menu_item(item_id)
+    item = (await db.get_menu_snapshot()).by_id.get(item_id)
     
     if not item:
         await callback.message.edit_text(
@@ -493,11 +573,114 @@ async def select_static_to_update(callback: CallbackQuery, state: FSMContext):
         f"Пришлите новую ссылку на пост в канале.\n"
         f"Ссылка должна быть в формате: <code>https://t.me/channel/123</code>\n\n"
         f"Для удаления URL отправьте сообщение 'удалить'",
+        reply_markup=get_static_item_keyboard(item_id)
+    )
+    await callback.answer()
+
+
+@callbacks(EditContentCallback)
+async def select_content_to_update(callback: CallbackQuery, state: FSMContext, callback_data: EditContentCallback):
+    """Handle selection of a menu item whose click answer should be edited."""
+    item_id = callback_data.item_id
+    
+    db = Database()
+    snapshot = await db.get_menu_snapshot()
+    item = snapshot.by_id.get(item_id)
+    
+    if not item:
+        await callback.message.edit_text(
+            "❌ <b>Ошибка</b>\n\n"
+            "Пункт меню не найден.",
+            reply_markup=get_back_keyboard()
+        )
+        await callback.answer()
+        return
+    
+    await state.update_data(item_id=item_id, title=item['title'])
+    await state.set_state(AdminStates.waiting_for_item_content)
+    
+    await callback.message.edit_text(
+        f"📝 <b>Текст ответа для пункта меню</b>\n\n"
+        f"Выбран: <b>{item['title']}</b>\n\n"
+        f"Текущий текст:\n<code>{html.escape(snapshot.answers[item_id])}</code>\n\n"
+        f"Пришлите новый текст (до {MAX_ITEM_CONTENT_LENGTH} символов).\n"
+        f"Для удаления текста отправьте сообщение 'удалить'",
         reply_markup=get_back_keyboard()
     )
     await callback.answer()
 
 
+@router.message(AdminStates.waiting_for_item_content)
+async def process_item_content(message: Message, state: FSMContext):
+    """Process the click answer text provided by admin."""
+    content = (message.text or "").strip()
+    
+    if content.lower() in ["удалить", "delete", "remove", "clear"]:
+        content = ""
+    elif not content or len(content) > MAX_ITEM_CONTENT_LENGTH:
+        await message.answer(
+            "❌ <b>Ошибка</b>\n\n"
+            f"Текст должен содержать от 1 до {MAX_ITEM_CONTENT_LENGTH} символов.\n"
+            "Пожалуйста, пришлите другой текст или отправьте 'удалить' для удаления.",
+            reply_markup=get_back_keyboard()
+        )
+        return
+    
+    data = await state.get_data()
+    title = data.get('title')
+    
+    if content:
+        confirm_text = (
+            f"🔄 <b>Подтверждение обновления</b>\n\n"
+            f"Пункт меню: <b>{title}</b>\n"
+            f"Новый текст:\n<code>{html.escape(content)}</code>\n\n"
+            f"Подтвердите обновление:"
+        )
+    else:
+        confirm_text = (
+            f"🔄 <b>Подтверждение удаления текста</b>\n\n"
+            f"Пункт меню: <b>{title}</b>\n"
+            f"Текст будет удален.\n\n"
+            f"Подтвердите удаление:"
+        )
+    
+    await message.answer(
+        confirm_text,
+        reply_markup=get_confirmation_keyboard(ConfirmUpdateItemContentCallback)
+    )
+    
+    await state.update_data(content=content)
+    await state.set_state(AdminStates.waiting_for_confirmation)
+
+
+@callbacks(ConfirmUpdateItemContentCallback, AdminStates.waiting_for_confirmation)
+async def confirm_update_item_content(callback: CallbackQuery, state: FSMContext):
+    """Handle confirmation of a click answer update."""
+    data = await state.get_data()
+    item_id = data.get('item_id')
+    title = data.get('title')
+    content = data.get('content')
+    
+    try:
+        await Database().set_item_content(item_id, content)
+        await state.clear()
+        
+        await callback.message.edit_text(
+            f"✅ <b>Текст {'обновлен' if content else 'удален'}</b>\n\n"
+            f"Пункт меню: <b>{title}</b>",
+            reply_markup=get_static_item_keyboard(item_id)
+        )
+    
+    except Exception as e:
+        await callback.message.edit_text(
+            f"❌ <b>Ошибка при обновлении текста</b>\n\n"
+            f"Детали: {str(e)}",
+            reply_markup=get_back_keyboard()
+        )
+    
+    await callback.answer()
+
+
 @router.message(AdminStates.waiting_for_static_url)
 async def process_static_url(message: Message, state: FSMContext):
     """Process the static item URL provided by admin."""
@@ -538,7 +721,7 @@ async def process_static_url(message: Message, state: FSMContext):
     
     await message.answer(
         confirm_text,
-        reply_markup=get_confirmation_keyboard("update_static_url")
+        reply_markup=get_confirmation_keyboard(ConfirmUpdateStaticUrlCallback)
     )
     
     # Обновляем состояние с URL
@@ -546,7 +729,7 @@ async def process_static_url(message: Message, state: FSMContext):
     await state.set_state(AdminStates.waiting_for_confirmation)
 
 
-@router.callback_query(AdminStates.waiting_for_confirmation, F.data == "confirm_update_static_url")
+@callbacks(ConfirmUpdateStaticUrlCallback, AdminStates.waiting_for_confirmation)
 async def confirm_update_static_url(callback: CallbackQuery, state: FSMContext):
     """Handle confirmation of static item URL update."""
     # Получаем данные из состояния
@@ -575,14 +758,16 @@ async def confirm_update_static_url(callback: CallbackQuery, state: FSMContext):
                 f"✅ <b>URL успешно удален</b>\n\n"
                 f"Пункт меню: <b>{title}</b>"
             )
+        success_text += f"\n\n{get_publish_hint(auto_publisher.notify_changed())}"
         
-        # Получаем обновленный список статических пунктов
-        menu_items = await db.get_menu_items()
-        static_items = [dict(item) for item in menu_items if item['type'] == 'info']
+        # Возвращаемся к странице, которая начинается с измененного пункта
+        page = await db.get_menu_items_page_at(item_id)
+        if not page.items:
+            page = await get_static_items_page(db)
         
         await callback.message.edit_text(
             success_text,
-            reply_markup=get_static_items_keyboard(static_items)
+            reply_markup=get_static_items_keyboard(page)
         )
     else:
         await callback.message.edit_text(
@@ -594,28 +779,163 @@ async def confirm_update_static_url(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.callback_query(F.data == "statistics")
-async def show_statistics(callback: CallbackQuery):
+@router.message(Command("export"))
+async def cmd_export(message: Message):
+    """Handle /export command to download the menu as a JSON document."""
+    document = await export_menu_document(Database())
+    filename = f"menu_{document['exported_at'][:10]}.json"
+    
+    await message.answer_document(
+        BufferedInputFile(dump_menu_document(document), filename=filename),
+        caption=(
+            f"📦 <b>Экспорт меню</b>\n\n"
+            f"Пунктов меню: {len(document['items'])}\n"
+            f"Отправьте этот файл с командой /import, чтобы восстановить меню."
+        )
+    )
+
+
+@router.message(Command("import"))
+async def cmd_import(message: Message, state: FSMContext):
+    """Handle /import command, with the document attached or sent next."""
+    if message.document:
+        await process_import_file(message, state)
+        return
+    
+    await state.set_state(AdminStates.waiting_for_import_file)
+    await message.answer(
+        "📥 <b>Импорт меню</b>\n\n"
+        "Пришлите JSON-файл, полученный командой /export.\n"
+        "Перед применением будет показан список изменений.",
+        reply_markup=get_back_keyboard()
+    )
+
+
+@router.message(AdminStates.waiting_for_import_file, F.document)
+async def process_import_file(message: Message, state: FSMContext):
+    """Validate an uploaded menu document and show what importing it would change."""
+    if message.document.file_size and message.document.file_size > MAX_IMPORT_FILE_SIZE:
+        await message.answer(
+            "❌ <b>Ошибка</b>\n\n"
+            f"Файл больше {MAX_IMPORT_FILE_SIZE // 1024} КБ.",
+            reply_markup=get_back_keyboard()
+        )
+        return
+    
+    db = Database()
+    try:
+        raw = await message.bot.download(message.document)
+        document = parse_menu_document(raw.read())
+    except MenuImportError as e:
+        await message.answer(
+            "❌ <b>Некорректный файл</b>\n\n"
+            f"Детали: {html.escape(str(e))}\n"
+            "Пришлите исправленный файл или нажмите «Назад».",
+            reply_markup=get_back_keyboard()
+        )
+        return
+    
+    diff = await diff_menu_document(db, document)
+    
+    confirm_text = (
+        "🔄 <b>Подтверждение импорта</b>\n\n"
+        f"Пунктов меню в файле: {len(document.items)}\n"
+        f"Ссылок на прайсы: {len(document.price_posts)}\n\n"
+    )
+    if diff:
+        shown = "\n".join(html.escape(line) for line in diff[:MAX_IMPORT_DIFF_LINES])
+        confirm_text += f"<b>Изменения:</b>\n<pre>{shown}</pre>\n"
+        if len(diff) > MAX_IMPORT_DIFF_LINES:
+            confirm_text += f"...и еще {len(diff) - MAX_IMPORT_DIFF_LINES}\n"
+        confirm_text += "\nТекущее меню будет полностью заменено. Подтвердите импорт:"
+    else:
+        confirm_text += "Файл совпадает с текущим меню. Подтвердите импорт:"
+    
+    await message.answer(
+        confirm_text,
+        reply_markup=get_confirmation_keyboard(ConfirmImportCallback)
+    )
+    
+    token = secrets.token_hex(8)
+    _pending_imports[message.from_user.id] = (token, document)
+    await state.update_data(import_token=token)
+    await state.set_state(AdminStates.waiting_for_confirmation)
+
+
+@router.message(AdminStates.waiting_for_import_file)
+async def process_import_not_file(message: Message):
+    """Remind the admin that /import expects a file."""
+    await message.answer(
+        "❌ Пришлите JSON-файл документом или нажмите «Назад».",
+        reply_markup=get_back_keyboard()
+    )
+
+
+@callbacks(ConfirmImportCallback, AdminStates.waiting_for_confirmation)
+async def confirm_import(callback: CallbackQuery, state: FSMContext):
+    """Handle confirmation of a menu import."""
+    data = await state.get_data()
+    token, document = _pending_imports.get(callback.from_user.id, (None, None))
+    
+    if document is None or token != data.get('import_token'):
+        # Lost on restart or replaced by a newer upload
+        await state.clear()
+        await callback.message.edit_text(
+            "❌ <b>Ошибка</b>\n\n"
+            "Файл импорта больше недоступен. Пришлите его снова командой /import.",
+            reply_markup=get_back_keyboard()
+        )
+        await callback.answer()
+        return
+    
+    try:
+        await Database().replace_menu(document.items, document.contents, document.price_posts)
+        _pending_imports.pop(callback.from_user.id, None)
+        await state.clear()
+        
+        await callback.message.edit_text(
+            "✅ <b>Меню импортировано</b>\n\n"
+            f"Пунктов меню: {len(document.items)}\n\n"
+            f"{get_publish_hint(auto_publisher.notify_changed())}",
+            reply_markup=get_back_keyboard()
+        )
+    
+    except Exception as e:
+        await callback.message.edit_text(
+            f"❌ <b>Ошибка при импорте меню</b>\n\n"
+            f"Детали: {html.escape(str(e))}",
+            reply_markup=get_back_keyboard()
+        )
+    
+    await callback.answer()
+
+
+@callbacks(StatisticsCallback)
+async def show_statistics(callback: CallbackQuery, rate_limiter=None):
     """Handle statistics request."""
     db = Database()
     
     try:
-        # Get menu config
-        config = await db.get_menu_config()
+        # Get menu config for every channel
+        configs = {config['channel_id']: config for config in await db.get_menu_configs()}
         
         # Get menu items count
-        menu_items = await db.get_menu_items()
+        menu_items = (await db.get_menu_snapshot()).items
         dynamic_items = [item for item in menu_items if item['is_dynamic']]
         
         # Prepare statistics text
         stats_text = "📊 <b>Статистика</b>\n\n"
         
-        if config and config['menu_message_id']:
-            stats_text += f"• Меню опубликовано в канале: ✅\n"
-            stats_text += f"• ID сообщения: <code>{config['menu_message_id']}</code>\n"
-            stats_text += f"• Статус закрепления: {'✅ Закреплено' if config['is_pinned'] else '❌ Не закреплено'}\n"
-        else:
-            stats_text += "• Меню не опубликовано в канале: ❌\n"
+        for channel_id in CHANNEL_IDS or [None]:
+            config = configs.get(channel_id)
+            if channel_id is not None:
+                stats_text += f"<b>Канал</b> <code>{html.escape(channel_id)}</code>\n"
+            if config and config['menu_message_id']:
+                stats_text += f"• Меню опубликовано в канале: ✅\n"
+                stats_text += f"• ID сообщения: <code>{config['menu_message_id']}</code>\n"
+                stats_text += f"• Статус закрепления: {'✅ Закреплено' if config['is_pinned'] else '❌ Не закреплено'}\n"
+            else:
+                stats_text += "• Меню не опубликовано в канале: ❌\n"
         
         stats_text += f"\n• Всего пунктов меню: {len(menu_items)}\n"
         stats_text += f"• Динамических прайс-листов: {len(dynamic_items)}\n"
@@ -625,13 +945,41 @@ async def show_statistics(callback: CallbackQuery):
             stats_text += "\n<b>Статус прайс-листов:</b>\n"
             
             for item in dynamic_items:
-                price_post = await db.get_price_post(item['id'])
-                url_status = "✅" if price_post and price_post['post_url'] else "❌"
+                url_status = "✅" if item['price_url'] else "❌"
                 stats_text += f"• {item['title']}: {url_status}\n"
         
+        # Add per-item click counts
+        click_counts = await db.get_click_counts()
+        clicked_items = sorted(
+            (item for item in menu_items if click_counts.get(item['id'])),
+            key=lambda item: click_counts[item['id']],
+            reverse=True
+        )
+        if clicked_items:
+            stats_text += "\n<b>Нажатия на кнопки меню:</b>\n"
+            for item in clicked_items:
+                stats_text += f"• {item['title']}: {click_counts[item['id']]}\n"
+        
+        # Add menu cache counters
+        cache_stats = db.cache.stats()
+        stats_text += (
+            f"\n<b>Кэш меню:</b> версия {cache_stats['version']}, "
+            f"попаданий {cache_stats['hits']}, промахов {cache_stats['misses']}\n"
+        )
+        
+        # Add Bot API queue metrics
+        if rate_limiter:
+            queue_stats = rate_limiter.stats()
+            stats_text += (
+                f"<b>Очередь Bot API:</b> сейчас {queue_stats['queue_depth']}, "
+                f"максимум {queue_stats['max_queue_depth']}, "
+                f"среднее ожидание {queue_stats['avg_wait'] * 1000:.0f} мс, "
+                f"повторов после 429: {queue_stats['retries']}\n"
+            )
+        
         await callback.message.edit_text(
             stats_text,
-            reply_markup=get_back_keyboard()
+            reply_markup=get_statistics_keyboard()
         )
     
     except Exception as e:
@@ -645,13 +993,270 @@ async def show_statistics(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data == "cancel")
+async def build_period_stats_text(db, days):
+    """Render click and publish statistics for the last ``days`` days from the rollups."""
+    menu_items = (await db.get_menu_snapshot()).items
+    totals = await db.get_event_totals(days)
+    click_counts = await db.get_click_counts(days)
+    histogram = await db.get_hourly_histogram(days)
+    
+    stats_text = f"📈 <b>Статистика за {days} дн.</b>\n\n"
+    stats_text += f"• Нажатий на кнопки: {totals.get(EVENT_CLICK, 0)}\n"
+    stats_text += f"• Публикаций меню: {totals.get(EVENT_PUBLISH, 0)}\n"
+    
+    clicked_items = sorted(
+        (item for item in menu_items if click_counts.get(item['id'])),
+        key=lambda item: click_counts[item['id']],
+        reverse=True
+    )
+    if clicked_items:
+        stats_text += "\n<b>Нажатия по кнопкам:</b>\n"
+        for item in clicked_items:
+            stats_text += f"• {item['title']}: {click_counts[item['id']]}\n"
+    
+    peak = max(histogram)
+    if peak:
+        stats_text += "\n<b>Нажатия по часам:</b>\n<pre>"
+        for hour, count in enumerate(histogram):
+            if count:
+                bar = "▇" * max(1, round(count * 10 / peak))
+                stats_text += f"{hour:02d}:00 {bar} {count}\n"
+        stats_text += "</pre>"
+    
+    return stats_text
+
+
+@router.message(Command("stats"))
+async def cmd_stats(message: Message, command: CommandObject):
+    """Handle /stats [days] command to show statistics for a period."""
+    days = int(command.args) if command.args and command.args.strip().isdigit() else 7
+    days = min(max(days, 1), 365)
+    
+    await message.answer(
+        await build_period_stats_text(Database(), days),
+        reply_markup=get_statistics_keyboard()
+    )
+
+
+@callbacks(StatsPeriodCallback)
+async def show_period_statistics(callback: CallbackQuery, callback_data: StatsPeriodCallback):
+    """Handle selection of a statistics period."""
+    days = callback_data.days
+    
+    await callback.message.edit_text(
+        await build_period_stats_text(Database(), days),
+        reply_markup=get_statistics_keyboard()
+    )
+    await callback.answer()
+
+
+def format_layout(stored):
+    """Format a stored layout spec (or the default one for None) with a group per line, ready to copy back."""
+    spec = json.loads(stored) if stored is not None else DEFAULT_LAYOUT
+    groups = ",\n".join(f"  {json.dumps(group, ensure_ascii=False)}" for group in spec['groups'])
+    text = f'{{"groups": [\n{groups}\n], "normalize_usernames": {json.dumps(spec["normalize_usernames"])}}}'
+    return html.escape(text, quote=False)
+
+
+@router.message(Command("layout"))
+async def cmd_layout(message: Message, command: CommandObject):
+    """Handle /layout [channel] [spec|default] command to show or change the menu keyboard layout."""
+    db = Database()
+    args = (command.args or "").strip()
+    
+    if not args:
+        text = "🧩 <b>Раскладка меню</b>\n\n"
+        for channel_id in CHANNEL_IDS:
+            stored = await db.get_menu_layout(channel_id)
+            kind = "своя" if stored is not None else "по умолчанию"
+            text += f"• <code>{html.escape(channel_id)}</code> — {kind}\n"
+        text += (
+            f"\n<b>По умолчанию:</b>\n<pre>{format_layout(None)}</pre>\n\n"
+            "<code>/layout &lt;канал&gt;</code> — показать раскладку канала\n"
+            "<code>/layout &lt;канал&gt; &lt;JSON&gt;</code> — задать раскладку\n"
+            "<code>/layout &lt;канал&gt; default</code> — вернуть раскладку по умолчанию\n"
+            "Если канал один, его можно не указывать."
+        )
+        await message.answer(text)
+        return
+    
+    target, *rest = args.split(maxsplit=1)
+    if target in CHANNEL_IDS:
+        channel_id, spec_text = target, "".join(rest)
+    elif len(CHANNEL_IDS) == 1:
+        channel_id, spec_text = CHANNEL_IDS[0], args
+    else:
+        await message.answer(
+            "❌ <b>Ошибка</b>\n\n"
+            "Укажите канал: " + ", ".join(f"<code>{html.escape(channel)}</code>" for channel in CHANNEL_IDS)
+        )
+        return
+    
+    channel = html.escape(channel_id)
+    
+    if not spec_text:
+        stored = await db.get_menu_layout(channel_id)
+        kind = "своя" if stored is not None else "по умолчанию"
+        await message.answer(f"🧩 <b>Раскладка {channel}</b> ({kind})\n\n<pre>{format_layout(stored)}</pre>")
+        return
+    
+    if spec_text == "default":
+        if await db.delete_menu_layout(channel_id):
+            text = f"✅ Для {channel} восстановлена раскладка по умолчанию."
+        else:
+            await message.answer(f"ℹ️ {channel} уже использует раскладку по умолчанию.")
+            return
+    else:
+        try:
+            spec = parse_layout(spec_text.translate(SMART_QUOTES))
+        except LayoutError as e:
+            await message.answer(
+                "❌ <b>Раскладка не сохранена</b>\n\n"
+                f"Ошибка: {html.escape(str(e))}"
+            )
+            return
+        
+        stored = dump_layout(spec)
+        await db.set_menu_layout(channel_id, stored)
+        text = f"✅ Раскладка {channel} сохранена:\n\n<pre>{format_layout(stored)}</pre>"
+    
+    await message.answer(f"{text}\n\n{get_publish_hint(auto_publisher.notify_changed())}")
+
+
+@router.message(Command("profile"))
+async def cmd_profile(message: Message, command: CommandObject):
+    """Handle /profile <seconds> command to profile the running bot."""
+    args = (command.args or "").strip()
+    
+    if not args.isdigit() or not 1 <= int(args) <= PROFILE_MAX_SECONDS:
+        await message.answer(
+            "❌ <b>Ошибка</b>\n\n"
+            f"Использование: <code>/profile &lt;секунды&gt;</code>, от 1 до {PROFILE_MAX_SECONDS}."
+        )
+        return
+    
+    if profiler.active:
+        await message.answer("⏳ Профилирование уже запущено, дождитесь результатов.")
+        return
+    
+    seconds = int(args)
+    await message.answer(f"🔬 Профилирование запущено на {seconds} с.")
+    
+    task = asyncio.create_task(run_profile(message, seconds))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def run_profile(message: Message, seconds):
+    """Profile the bot for ``seconds`` and send the summary and the stats file to the admin."""
+    try:
+        result = await profiler.run(seconds)
+    except Exception as e:
+        await message.answer(
+            f"❌ <b>Ошибка профилирования</b>\n\n"
+            f"Детали: {html.escape(str(e))}"
+        )
+        return
+    
+    await message.answer(
+        f"🔬 <b>Профиль за {result.seconds:.1f} с</b>\n\n"
+        f"<pre>{html.escape(result.summary[:3500])}</pre>"
+    )
+    await message.answer_document(
+        FSInputFile(result.path),
+        caption="Файл pstats: <code>python -m pstats</code>, snakeviz или flameprof."
+    )
+
+
+@router.message(Command("slowlog"))
+async def cmd_slowlog(message: Message):
+    """Handle /slowlog command to list the slowest recent updates."""
+    entries = slow_log.slowest(SLOWLOG_LIMIT)
+    
+    if not entries:
+        await message.answer("🐢 <b>Медленные обновления</b>\n\nОбновлений еще не было.")
+        return
+    
+    lines = []
+    for entry in entries:
+        status = "" if entry.status == "ok" else f" [{entry.status}]"
+        lines.append(
+            f"{datetime.fromtimestamp(entry.timestamp):%H:%M:%S} {entry.duration * 1000:>8.1f} ms  "
+            f"{entry.handler} ({entry.prefix or entry.event}) user {entry.user_id}{status}"
+        )
+    
+    table = html.escape("\n".join(lines))
+    await message.answer(
+        f"🐢 <b>Самые медленные из последних {len(slow_log.entries)} обновлений</b>\n\n"
+        f"<pre>{table}</pre>"
+    )
+
+
+@router.message(Command("admins"))
+async def cmd_admins(message: Message):
+    """Handle /admins command to list the admin roster."""
+    granted = await Database().get_admins()
+    
+    text = "👥 <b>Администраторы</b>\n\n"
+    for user_id in sorted(admins.static_ids):
+        text += f"• <code>{user_id}</code> — из настроек (ADMIN_IDS)\n"
+    for row in granted:
+        if not admins.is_static(row['user_id']):
+            text += f"• <code>{row['user_id']}</code> — добавлен {row['added_at']}\n"
+    text += "\n/grant &lt;id&gt; — добавить, /revoke &lt;id&gt; — удалить"
+    
+    await message.answer(text)
+
+
+def parse_user_id(command: CommandObject):
+    """Get the user ID argument of /grant and /revoke, or None if it is missing or invalid."""
+    args = (command.args or "").strip()
+    return int(args) if args.isdigit() else None
+
+
+@router.message(Command("grant"))
+async def cmd_grant(message: Message, command: CommandObject):
+    """Handle /grant <user_id> command to add an admin."""
+    user_id = parse_user_id(command)
+    
+    if user_id is None:
+        await message.answer("❌ Использование: <code>/grant &lt;id пользователя&gt;</code>")
+        return
+    
+    if await admins.grant(user_id, added_by=message.from_user.id):
+        await message.answer(f"✅ Пользователь <code>{user_id}</code> теперь администратор.")
+    else:
+        await message.answer(f"ℹ️ Пользователь <code>{user_id}</code> уже администратор.")
+
+
+@router.message(Command("revoke"))
+async def cmd_revoke(message: Message, command: CommandObject):
+    """Handle /revoke <user_id> command to remove an admin."""
+    user_id = parse_user_id(command)
+    
+    if user_id is None:
+        await message.answer("❌ Использование: <code>/revoke &lt;id пользователя&gt;</code>")
+        return
+    
+    if admins.is_static(user_id):
+        await message.answer(
+            f"❌ Пользователь <code>{user_id}</code> задан в ADMIN_IDS, "
+            "его права можно снять только в настройках."
+        )
+    elif await admins.revoke(user_id):
+        await message.answer(f"✅ Пользователь <code>{user_id}</code> больше не администратор.")
+    else:
+        await message.answer(f"ℹ️ Пользователь <code>{user_id}</code> не администратор.")
+
+
+@callbacks(CancelCallback)
 async def cancel_action(callback: CallbackQuery, state: FSMContext):
     """Handle cancellation of any action."""
     current_state = await state.get_state()
     
     if current_state:
         await state.clear()
+    _pending_imports.pop(callback.from_user.id, None)
     
     await callback.message.edit_text(
         "❌ <b>Действие отменено</b>\n\n"
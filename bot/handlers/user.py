@@ -1,20 +1,25 @@
-from aiogram import Router, F
+from aiogram import Router
 from aiogram.types import Message, CallbackQuery
 from aiogram.filters import Command, CommandStart
 
+from bot.callbacks import CallbackTable, MenuItemCallback
+from bot.handlers.admin import ADMIN_COMMANDS
 from bot.keyboards import get_admin_main_keyboard
+from bot.utils.admins import IsAdmin, admins
+from bot.utils.analytics import analytics
 from database import Database
-from config import ADMIN_IDS
+from database.defaults import NOT_FOUND_ANSWER
 
 # Initialize router
 router = Router()
+callbacks = CallbackTable(router)
 
 
 @router.message(CommandStart())
 async def cmd_start(message: Message):
     """Handle /start command."""
     user_id = message.from_user.id
-    is_admin = user_id in ADMIN_IDS
+    is_admin = admins.is_admin(user_id)
     
     greeting = (
         f"👋 Здравствуйте, {message.from_user.first_name}!\n\n"
@@ -38,7 +43,7 @@ async def cmd_start(message: Message):
 async def cmd_help(message: Message):
     """Handle /help command."""
     user_id = message.from_user.id
-    is_admin = user_id in ADMIN_IDS
+    is_admin = admins.is_admin(user_id)
     
     help_text = (
         "📚 <b>Справка по командам</b>\n\n"
@@ -50,6 +55,14 @@ async def cmd_help(message: Message):
         help_text += (
             "\n<b>Команды администратора:</b>\n"
             "/admin - Открыть панель администратора\n"
+            "/export - Выгрузить меню в JSON-файл\n"
+            "/import - Загрузить меню из JSON-файла\n"
+            "/layout - Раскладка кнопок меню в канале\n"
+            "/profile &lt;секунды&gt; - Профилировать работу бота\n"
+            "/slowlog - Самые медленные обновления\n"
+            "/admins - Список администраторов\n"
+            "/grant &lt;id&gt; - Добавить администратора\n"
+            "/revoke &lt;id&gt; - Удалить администратора\n"
             "\n<b>В панели администратора вы можете:</b>\n"
             "• Публиковать меню в канал\n"
             "• Обновлять прайс-листы\n"
@@ -60,69 +73,30 @@ async def cmd_help(message: Message):
     await message.answer(help_text)
 
 
-@router.callback_query(F.data.startswith("menu_item:"))
-async def handle_menu_item_click(callback: CallbackQuery):
+@callbacks(MenuItemCallback)
+async def handle_menu_item_click(callback: CallbackQuery, callback_data: MenuItemCallback):
     """Handle clicks on menu items from users."""
     # This would be triggered if users click on menu items in the channel
     # For most cases, we'll use URL buttons that open directly
     # This handler is for items that don't have URLs
     
-    item_id = int(callback.data.split(":")[1])
+    item_id = callback_data.item_id
+    analytics.record_click(item_id, callback.from_user.id)
     
-    db = Database()
-    item = await db.get_menu_item(item_id)
-    
-    if not item:
-        await callback.answer("Информация не найдена", show_alert=True)
-        return
-    
-    # Different responses based on item type
-    if item['type'] == 'info':
-        # These would typically have content stored in the database
-        # For now, we'll use placeholder responses
-        responses = {
-            "✅ Гарантия": (
-                "🔹 На все новые устройства гарантия 1 год\n"
-                "🔹 На б/у устройства гарантия 1 месяц\n"
-                "🔹 Гарантия распространяется на заводские дефекты"
-            ),
-            "🏠 Адрес / Как нас найти?": (
-                "🏢 Наш адрес: г. Орск, пр. Ленина, 21\n"
-                "🕙 Режим работы: Пн-Пт с 10:00 до 19:00, Сб-Вс с 10:00 до 17:00\n"
-                "📍 Ориентир: ТЦ «Яблочный Спас», 2 этаж"
-            ),
-            "💳 Рассрочка / Кредит от 1%": (
-                "💳 Предлагаем рассрочку и кредит от 1%\n"
-                "📝 Для оформления необходим только паспорт\n"
-                "⏱ Решение принимается за 15 минут"
-            ),
-            "🚚 Доставка": (
-                "🚚 Доставка по городу - бесплатно\n"
-                "🌍 Доставка в другие города - по тарифам транспортных компаний\n"
-                "⏱ Срок доставки: 1-2 дня"
-            ),
-            "💰 Оплата": (
-                "💵 Наличными при получении\n"
-                "💳 Банковской картой\n"
-                "📱 Переводом на карту"
-            ),
-            "‼ Ответы на часто задаваемые вопросы": (
-                "❓ <b>Можно ли проверить устройство перед покупкой?</b>\n"
-                "✅ Да, мы предоставляем возможность полной проверки\n\n"
-                "❓ <b>Есть ли у вас рассрочка без переплаты?</b>\n"
-                "✅ Да, предлагаем рассрочку 0% на 3 месяца\n\n"
-                "❓ <b>Работаете ли вы с регионами?</b>\n"
-                "✅ Да, отправляем товары по всей России"
-            )
-        }
-        
-        response = responses.get(item['title'], "Информация будет добавлена позже")
-        await callback.answer(response, show_alert=True)
-    
-    elif item['type'] == 'price' and item['is_dynamic']:
-        # For dynamic price items without URLs yet
-        await callback.answer("Прайс-лист еще не добавлен", show_alert=True)
-    
-    else:
-        # Generic response for other items
-        await callback.answer("Информация будет добавлена позже", show_alert=True)
+    # Answers are precomputed per menu snapshot, so a warm cache needs no DB access
+    snapshot = await Database().get_menu_snapshot()
+    response = snapshot.answers.get(item_id, NOT_FOUND_ANSWER)
+    await callback.answer(response, show_alert=True)
+
+
+# Admin commands and buttons used by non-admins (the admin router filters them out)
+@router.message(Command(*ADMIN_COMMANDS), ~IsAdmin())
+async def deny_admin_command(message: Message):
+    """Refuse admin commands from non-admins."""
+    await message.answer("⛔ У вас нет доступа к этой команде.")
+
+
+@router.callback_query(~IsAdmin())
+async def deny_admin_callback(callback: CallbackQuery):
+    """Refuse admin panel buttons pressed by non-admins."""
+    await callback.answer("⛔ У вас нет доступа к этой функции.", show_alert=True)
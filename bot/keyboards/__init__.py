@@ -4,9 +4,13 @@ from .admin_kb import (
     get_menu_settings_keyboard,
     get_confirmation_keyboard,
     get_back_keyboard,
-    get_static_items_keyboard
+    get_static_items_keyboard,
+    get_static_item_keyboard,
+    get_statistics_keyboard,
+    get_price_url_keyboard
 )
-from .menu_kb import get_channel_menu_keyboard
+from .layout import LayoutError, DEFAULT_LAYOUT, parse_layout, dump_layout, load_layout
+from .menu_kb import get_channel_menu_keyboard, compile_channel_menu_keyboard
 
 __all__ = [
     'get_admin_main_keyboard',
@@ -15,5 +19,14 @@ __all__ = [
     'get_confirmation_keyboard',
     'get_back_keyboard',
     'get_static_items_keyboard',
-    'get_channel_menu_keyboard'
+    'get_static_item_keyboard',
+    'get_statistics_keyboard',
+    'get_price_url_keyboard',
+    'get_channel_menu_keyboard',
+    'compile_channel_menu_keyboard',
+    'LayoutError',
+    'DEFAULT_LAYOUT',
+    'parse_layout',
+    'dump_layout',
+    'load_layout'
 ]
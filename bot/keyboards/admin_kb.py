@@ -1,92 +1,186 @@
+from functools import lru_cache
+
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
+from bot.callbacks import (
+    BackToAdminCallback,
+    CancelCallback,
+    EditContentCallback,
+    MenuSettingsCallback,
+    PriceHistoryCallback,
+    PublishMenuCallback,
+    RefreshMenuCallback,
+    StaticItemsCallback,
+    StaticItemsPageCallback,
+    StatisticsCallback,
+    StatsPeriodCallback,
+    TogglePinCallback,
+    UpdatePriceCallback,
+    UpdatePricesCallback,
+    UpdateStaticCallback
+)
+from database.defaults import ITEM_TYPES
+from .layout import compile_layout, parse_layout
+
+# Keyboards below that don't depend on menu data are built once and shared,
+# callers must not modify them.
+
+@lru_cache(maxsize=None)
 def get_admin_main_keyboard():
     """
     Create main admin keyboard.
     """
     buttons = [
-        [InlineKeyboardButton(text="📝 Опубликовать меню в канал", callback_data="publish_menu")],
-        [InlineKeyboardButton(text="📊 Обновить прайс-листы", callback_data="update_prices")],
-        [InlineKeyboardButton(text="⚙️ Настройки меню", callback_data="menu_settings")],
-        [InlineKeyboardButton(text="📊 Статистика", callback_data="statistics")]
+        [InlineKeyboardButton(text="📝 Опубликовать меню в канал", callback_data=PublishMenuCallback().pack())],
+        [InlineKeyboardButton(text="📊 Обновить прайс-листы", callback_data=UpdatePricesCallback().pack())],
+        [InlineKeyboardButton(text="⚙️ Настройки меню", callback_data=MenuSettingsCallback().pack())],
+        [InlineKeyboardButton(text="📊 Статистика", callback_data=StatisticsCallback().pack())]
     ]
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
+@lru_cache(maxsize=None)
 def get_price_update_keyboard():
     """
     Create keyboard for updating price posts.
     """
     buttons = [
-        [InlineKeyboardButton(text="📱 Новые iPhone", callback_data="update_price:new_iphone")],
-        [InlineKeyboardButton(text="📱 Б/У iPhone", callback_data="update_price:used_iphone")],
-        [InlineKeyboardButton(text="🎧 AirPods и Apple Watch", callback_data="update_price:airpods_watch")],
-        [InlineKeyboardButton(text="◀️ Назад", callback_data="back_to_admin")]
+        [InlineKeyboardButton(text="📱 Новые iPhone", callback_data=UpdatePriceCallback(price_type="new_iphone").pack())],
+        [InlineKeyboardButton(text="📱 Б/У iPhone", callback_data=UpdatePriceCallback(price_type="used_iphone").pack())],
+        [InlineKeyboardButton(text="🎧 AirPods и Apple Watch", callback_data=UpdatePriceCallback(price_type="airpods_watch").pack())],
+        [InlineKeyboardButton(text="◀️ Назад", callback_data=BackToAdminCallback().pack())]
     ]
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
+@lru_cache(maxsize=None)
+def get_price_url_keyboard(price_type):
+    """
+    Create keyboard shown while updating a price post link.
+    
+    Args:
+        price_type: Price list key from the price update keyboard
+    """
+    buttons = [
+        [InlineKeyboardButton(text="🕘 История ссылок", callback_data=PriceHistoryCallback(price_type=price_type).pack())],
+        [InlineKeyboardButton(text="◀️ Назад", callback_data=BackToAdminCallback().pack())]
+    ]
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+@lru_cache(maxsize=None)
 def get_menu_settings_keyboard():
     """
     Create keyboard for menu settings.
     """
     buttons = [
-        [InlineKeyboardButton(text="📌 Закрепить/Открепить сообщение", callback_data="toggle_pin")],
-        [InlineKeyboardButton(text="🔄 Обновить меню", callback_data="refresh_menu")],
-        [InlineKeyboardButton(text="📄 Настроить статические пункты", callback_data="static_items")],
-        [InlineKeyboardButton(text="◀️ Назад", callback_data="back_to_admin")]
+        [InlineKeyboardButton(text="📌 Закрепить/Открепить сообщение", callback_data=TogglePinCallback().pack())],
+        [InlineKeyboardButton(text="🔄 Обновить меню", callback_data=RefreshMenuCallback().pack())],
+        [InlineKeyboardButton(text="📄 Настроить статические пункты", callback_data=StaticItemsCallback().pack())],
+        [InlineKeyboardButton(text="◀️ Назад", callback_data=BackToAdminCallback().pack())]
     ]
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
-def get_confirmation_keyboard(action, item_id=None):
+@lru_cache(maxsize=None)
+def get_confirmation_keyboard(confirm):
     """
     Create confirmation keyboard.
     
     Args:
-        action: Action to confirm (e.g., 'publish', 'update')
-        item_id: Optional item ID for context
+        confirm: Callback data class of the action to confirm (e.g., ConfirmPublishCallback)
     """
-    confirm_data = f"confirm_{action}"
-    cancel_data = "cancel"
-    
-    if item_id:
-        confirm_data += f":{item_id}"
-    
     buttons = [
         [
-            InlineKeyboardButton(text="✅ Подтвердить", callback_data=confirm_data),
-            InlineKeyboardButton(text="❌ Отмена", callback_data=cancel_data)
+            InlineKeyboardButton(text="✅ Подтвердить", callback_data=confirm().pack()),
+            InlineKeyboardButton(text="❌ Отмена", callback_data=CancelCallback().pack())
         ]
     ]
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
+@lru_cache(maxsize=None)
+def get_statistics_keyboard():
+    """
+    Create keyboard for choosing a statistics period.
+    """
+    buttons = [
+        [
+            InlineKeyboardButton(text="📈 1 день", callback_data=StatsPeriodCallback(days=1).pack()),
+            InlineKeyboardButton(text="📈 7 дней", callback_data=StatsPeriodCallback(days=7).pack()),
+            InlineKeyboardButton(text="📈 30 дней", callback_data=StatsPeriodCallback(days=30).pack())
+        ],
+        [InlineKeyboardButton(text="◀️ Назад", callback_data=BackToAdminCallback().pack())]
+    ]
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+@lru_cache(maxsize=None)
 def get_back_keyboard():
     """
     Create a simple back button keyboard.
     """
     buttons = [
-        [InlineKeyboardButton(text="◀️ Назад", callback_data="back_to_admin")]
+        [InlineKeyboardButton(text="◀️ Назад", callback_data=BackToAdminCallback().pack())]
     ]
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
-def get_static_items_keyboard(items):
+def _static_item_button(item, url):
+    # Показываем статус URL для каждого пункта
+    url_status = "✅" if url else "❌"
+    return InlineKeyboardButton(
+        text=f"{url_status} {item['title']}",
+        callback_data=UpdateStaticCallback(item_id=item['id']).pack()
+    )
+
+
+# Static items are listed one per row, in the order they come in
+_render_static_items = compile_layout(parse_layout({
+    'groups': [{'types': list(ITEM_TYPES), 'row_width': 1}],
+    'normalize_usernames': False
+}))
+
+
+def get_static_items_keyboard(page):
     """
-    Create keyboard for managing static menu items.
+    Create keyboard for managing static menu items, one page at a time.
     
     Args:
-        items: List of static menu items from the database
+        page: MenuItemsPage of static menu items from the database
     """
-    buttons = []
+    buttons = _render_static_items(page.items, _static_item_button)
     
-    # Добавляем кнопки для каждого статического пункта меню
-    for item in items:
-        # Показываем статус URL для каждого пункта
-        url_status = "✅" if item['url'] else "❌"
-        buttons.append([InlineKeyboardButton(
-            text=f"{url_status} {item['title']}", 
-            callback_data=f"update_static:{item['id']}"
-        )])
+    # Листание страниц: курсором служит первый или последний пункт страницы
+    navigation = []
+    if page.has_prev:
+        first = page.items[0]
+        navigation.append(InlineKeyboardButton(
+            text="⬅️ Предыдущие",
+            callback_data=StaticItemsPageCallback(
+                position=first['position'], item_id=first['id'], backward=True
+            ).pack()
+        ))
+    if page.has_next:
+        last = page.items[-1]
+        navigation.append(InlineKeyboardButton(
+            text="Следующие ➡️",
+            callback_data=StaticItemsPageCallback(
+                position=last['position'], item_id=last['id'], backward=False
+            ).pack()
+        ))
+    if navigation:
+        buttons.append(navigation)
     
     # Добавляем кнопку возврата
-    buttons.append([InlineKeyboardButton(text="◀️ Назад", callback_data="menu_settings")])
+    buttons.append([InlineKeyboardButton(text="◀️ Назад", callback_data=MenuSettingsCallback().pack())])
+    
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def get_static_item_keyboard(item_id):
+    """
+    Create keyboard for a single static menu item.
     
+    Args:
+        item_id: ID of the selected menu item
+    """
+    buttons = [
+        [InlineKeyboardButton(text="📝 Изменить текст ответа", callback_data=EditContentCallback(item_id=item_id).pack())],
+        [InlineKeyboardButton(text="◀️ Назад", callback_data=BackToAdminCallback().pack())]
+    ]
     return InlineKeyboardMarkup(inline_keyboard=buttons)
@@ -0,0 +1,152 @@
+import json
+from functools import lru_cache
+
+from database.defaults import ITEM_TYPES
+
+# Telegram shows at most 8 buttons in a row
+MAX_ROW_WIDTH = 8
+
+# Layout used for channels without their own: prices and contacts one per row, info two per row
+DEFAULT_LAYOUT = {
+    'groups': [
+        {'types': ['price'], 'row_width': 1},
+        {'types': ['info'], 'row_width': 2},
+        {'types': ['contact'], 'row_width': 1}
+    ],
+    'normalize_usernames': True
+}
+
+LAYOUT_KEYS = {'groups', 'normalize_usernames'}
+GROUP_KEYS = {'types', 'row_width'}
+
+
+class LayoutError(ValueError):
+    """Raised when a keyboard layout spec is invalid; the message is shown to the admin."""
+
+
+def _require(condition, message):
+    if not condition:
+        raise LayoutError(message)
+
+
+def parse_layout(raw):
+    """
+    Parse and validate a keyboard layout spec.
+
+    A spec lists groups of item types in display order, each with the number
+    of buttons per row; item types missing from every group are not shown.
+    With ``normalize_usernames`` on, ``@username`` URLs become t.me links.
+
+    Args:
+        raw: JSON text or an already decoded dict
+
+    Returns:
+        dict: Spec with defaults filled in
+
+    Raises:
+        LayoutError: If the spec is not a valid layout
+    """
+    if isinstance(raw, (str, bytes)):
+        try:
+            spec = json.loads(raw)
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise LayoutError(f"не удалось разобрать JSON: {e}") from e
+    else:
+        spec = raw
+
+    _require(isinstance(spec, dict), "раскладка должна быть JSON-объектом")
+    unknown = set(spec) - LAYOUT_KEYS
+    _require(not unknown, f"неизвестные поля: {', '.join(sorted(unknown))}")
+    groups = spec.get('groups')
+    _require(isinstance(groups, list) and groups, "список groups пуст или отсутствует")
+    normalize_usernames = spec.get('normalize_usernames', True)
+    _require(isinstance(normalize_usernames, bool), "normalize_usernames должен быть true или false")
+
+    seen_types = set()
+    parsed_groups = []
+    for number, group in enumerate(groups, 1):
+        where = f"группа #{number}"
+        _require(isinstance(group, dict), f"{where}: ожидался объект")
+        unknown = set(group) - GROUP_KEYS
+        _require(not unknown, f"{where}: неизвестные поля: {', '.join(sorted(unknown))}")
+
+        types = group.get('types')
+        _require(isinstance(types, list) and types, f"{where}: список types пуст или отсутствует")
+        for item_type in types:
+            _require(item_type in ITEM_TYPES, f"{where}: тип должен быть одним из {', '.join(ITEM_TYPES)}")
+            _require(item_type not in seen_types, f"{where}: тип {item_type} уже есть в другой группе")
+            seen_types.add(item_type)
+
+        row_width = group.get('row_width', 1)
+        _require(isinstance(row_width, int) and not isinstance(row_width, bool) and 1 <= row_width <= MAX_ROW_WIDTH,
+                 f"{where}: row_width должен быть целым числом от 1 до {MAX_ROW_WIDTH}")
+        parsed_groups.append({'types': list(types), 'row_width': row_width})
+
+    return {'groups': parsed_groups, 'normalize_usernames': normalize_usernames}
+
+
+def dump_layout(spec):
+    """Serialize a parsed layout spec in the canonical form it is stored and cached by."""
+    return json.dumps(spec, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+
+
+def normalize_url(url):
+    """Turn an ``@username`` into a t.me link, leaving other URLs as they are."""
+    if url and url.startswith('@'):
+        return f"https://t.me/{url[1:]}"
+    return url
+
+
+def _keep_url(url):
+    return url
+
+
+def compile_layout(spec):
+    """
+    Compile a parsed layout spec into a renderer.
+
+    The renderer takes menu items and a ``button(item, url)`` factory and
+    returns keyboard rows: each item goes to the slot of its type's group,
+    keeping the order the items came in, and every group is cut into rows
+    of its width.
+
+    Args:
+        spec: Layout spec as returned by parse_layout()
+
+    Returns:
+        callable: ``render(items, button)`` returning a list of button rows
+    """
+    slots = {}
+    for index, group in enumerate(spec['groups']):
+        for item_type in group['types']:
+            slots[item_type] = index
+    widths = tuple(group['row_width'] for group in spec['groups'])
+    resolve_url = normalize_url if spec['normalize_usernames'] else _keep_url
+
+    def render(items, button):
+        buckets = [[] for _ in widths]
+        for item in items:
+            index = slots.get(item['type'])
+            if index is not None:
+                buckets[index].append(button(item, resolve_url(item['url'])))
+
+        rows = []
+        for width, bucket in zip(widths, buckets):
+            rows.extend(bucket[start:start + width] for start in range(0, len(bucket), width))
+        return rows
+
+    return render
+
+
+@lru_cache(maxsize=32)
+def load_layout(stored=None):
+    """
+    Get the compiled renderer for a stored layout spec, compiling it on first use.
+
+    Args:
+        stored: Canonical JSON of the spec as saved in menu_layouts, None for the default layout
+
+    Returns:
+        callable: Renderer from compile_layout()
+    """
+    return compile_layout(parse_layout(stored if stored is not None else DEFAULT_LAYOUT))
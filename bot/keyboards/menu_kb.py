@@ -1,69 +1,80 @@
+from collections import OrderedDict
+from typing import NamedTuple
+
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
-async def get_channel_menu_keyboard(menu_items):
+from bot.callbacks import MenuItemCallback
+from .layout import load_layout
+
+# Compiled channel keyboards, keyed by the layout and menu content they were built from
+_COMPILED_CACHE_SIZE = 32
+_compiled_keyboards = OrderedDict()
+
+
+class CompiledKeyboard(NamedTuple):
+    """Channel menu keyboard together with its serialized form."""
+
+    markup: InlineKeyboardMarkup
+    payload: str
+
+
+def _menu_key(menu_items):
+    """Build a hashable key from the fields that affect the channel keyboard."""
+    return tuple((item['id'], item['type'], item['title'], item['url']) for item in menu_items)
+
+
+def _menu_button(item, url):
+    """Link button when the item has a URL, otherwise a button answering the click in the bot."""
+    if url:
+        return InlineKeyboardButton(text=item['title'], url=url)
+    return InlineKeyboardButton(text=item['title'], callback_data=MenuItemCallback(item_id=item['id']).pack())
+
+
+def _build_channel_menu_keyboard(menu_items, layout=None):
+    """Build the channel menu keyboard from scratch."""
+    render = load_layout(layout)
+    return InlineKeyboardMarkup(inline_keyboard=render(menu_items, _menu_button))
+
+
+def compile_channel_menu_keyboard(menu_items, layout=None):
+    """
+    Get the compiled channel menu keyboard, building it only when the menu or layout changed.
+
+    The returned markup is shared between callers and must not be modified.
+
+    Args:
+        menu_items: List of menu item dictionaries from the database
+        layout: Stored layout spec of the channel, None for the default layout
+
+    Returns:
+        CompiledKeyboard: Keyboard markup and its serialized JSON
+    """
+    key = (layout, _menu_key(menu_items))
+    compiled = _compiled_keyboards.get(key)
+
+    if compiled is not None:
+        _compiled_keyboards.move_to_end(key)
+        return compiled
+
+    markup = _build_channel_menu_keyboard(menu_items, layout)
+    compiled = CompiledKeyboard(markup, markup.model_dump_json(exclude_none=True))
+
+    _compiled_keyboards[key] = compiled
+    if len(_compiled_keyboards) > _COMPILED_CACHE_SIZE:
+        _compiled_keyboards.popitem(last=False)
+
+    return compiled
+
+
+async def get_channel_menu_keyboard(menu_items, layout=None):
     """
     Create channel menu keyboard from menu items.
-    
+
     Args:
         menu_items: List of menu item dictionaries from the database
-    
+        layout: Stored layout spec of the channel, None for the default layout
+
     Returns:
         InlineKeyboardMarkup: Formatted menu keyboard
     """
-    # Group items by type to organize them
-    price_items = []
-    info_items = []
-    contact_items = []
-    
-    for item in menu_items:
-        if item['type'] == 'price':
-            price_items.append(item)
-        elif item['type'] == 'info':
-            info_items.append(item)
-        elif item['type'] == 'contact':
-            contact_items.append(item)
-    
-    # Prepare the keyboard buttons
-    buttons = []
-    
-    # Add price items (always 1 per row)
-    for item in price_items:
-        url = item['url']
-        # For dynamic items, we'll use the URL from price_posts table
-        # This is handled in the handler function
-        if url:
-            buttons.append([InlineKeyboardButton(text=item['title'], url=url)])
-        else:
-            # Placeholder for items that don't have URLs yet
-            buttons.append([InlineKeyboardButton(text=item['title'], callback_data=f"menu_item:{item['id']}")])
-    
-    # Add info items (2 per row when possible)
-    info_row = []
-    for item in info_items:
-        # Если у пункта есть URL, используем его для перехода на пост в канале
-        if item['url']:
-            info_row.append(InlineKeyboardButton(text=item['title'], url=item['url']))
-        else:
-            # Если URL нет, используем callback как раньше
-            info_row.append(InlineKeyboardButton(text=item['title'], callback_data=f"menu_item:{item['id']}"))
-        
-        if len(info_row) == 2:
-            buttons.append(info_row)
-            info_row = []
-    
-    # Add any remaining info items
-    if info_row:
-        buttons.append(info_row)
-    
-    # Add contact items (always 1 per row)
-    for item in contact_items:
-        if item['url'] and item['url'].startswith('@'):
-            # This is a username link
-            buttons.append([InlineKeyboardButton(text=item['title'], url=f"https://t.me/{item['url'][1:]}")])
-        elif item['url']:
-            # This is a regular URL
-            buttons.append([InlineKeyboardButton(text=item['title'], url=item['url'])])
-        else:
-            buttons.append([InlineKeyboardButton(text=item['title'], callback_data=f"menu_item:{item['id']}")])
-    
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
+    return compile_channel_menu_keyboard(menu_items, layout).markup
@@ -1,3 +1,4 @@
 from .db import setup_database
+from .publisher import publish_channel_menu
 
-__all__ = ['setup_database']
+__all__ = ['setup_database', 'publish_channel_menu']
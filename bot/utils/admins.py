@@ -0,0 +1,61 @@
+from aiogram.filters import Filter
+
+from config import ADMIN_IDS
+from database import Database
+
+
+class AdminRegistry:
+    """
+    In-memory admin roster: ADMIN_IDS from the environment plus admins granted in the bot.
+
+    Lookups read an immutable frozenset; grants and revocations write to the
+    database and swap in a freshly loaded set, so changes apply without a restart.
+    """
+
+    def __init__(self, db=None, static_ids=ADMIN_IDS):
+        self.db = db or Database()
+        self.static_ids = frozenset(static_ids)
+        self.ids = self.static_ids
+
+    def is_admin(self, user_id):
+        """Check whether a user is an admin."""
+        return user_id in self.ids
+
+    def is_static(self, user_id):
+        """Check whether a user is an admin through ADMIN_IDS and can't be revoked in the bot."""
+        return user_id in self.static_ids
+
+    async def load(self):
+        """Reload the roster from the database."""
+        rows = await self.db.get_admins()
+        self.ids = self.static_ids | frozenset(row['user_id'] for row in rows)
+        return self.ids
+
+    async def grant(self, user_id, added_by=None):
+        """Grant admin rights; returns False if the user already was an admin."""
+        if self.is_admin(user_id):
+            return False
+        await self.db.add_admin(user_id, added_by)
+        await self.load()
+        return True
+
+    async def revoke(self, user_id):
+        """Revoke admin rights granted in the bot; returns False if there was nothing to revoke."""
+        removed = await self.db.remove_admin(user_id)
+        await self.load()
+        return removed
+
+
+class IsAdmin(Filter):
+    """Passes events from admins; a set lookup, cheap enough for router-level filtering."""
+
+    def __init__(self, registry=None):
+        self.registry = registry or admins
+
+    async def __call__(self, event):
+        user = getattr(event, 'from_user', None)
+        return user is not None and self.registry.is_admin(user.id)
+
+
+# Shared roster, loaded in setup_database()
+admins = AdminRegistry()
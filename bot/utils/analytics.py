@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import time
+from contextlib import suppress
+
+from config import ANALYTICS_BATCH_SIZE, ANALYTICS_FLUSH_INTERVAL_MS, ANALYTICS_QUEUE_SIZE
+from database import Database
+
+EVENT_CLICK = 'click'
+EVENT_PUBLISH = 'publish'
+
+
+class EventRecorder:
+    """
+    Buffers analytics events in memory and writes them in batches.
+
+    Recording never waits on the database: events go into a bounded queue and a
+    background task flushes them every ``flush_interval`` seconds or every
+    ``batch_size`` events, whichever comes first.
+    """
+
+    def __init__(self, db=None, batch_size=ANALYTICS_BATCH_SIZE,
+                 flush_interval=ANALYTICS_FLUSH_INTERVAL_MS / 1000, max_queue=ANALYTICS_QUEUE_SIZE):
+        self.db = db or Database()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.written = 0
+        self.dropped = 0
+        self._task = None
+
+    def record(self, event_type, item_id=None, user_id=None):
+        """Queue an event without waiting."""
+        try:
+            self.queue.put_nowait((event_type, item_id, user_id, int(time.time())))
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def record_click(self, item_id, user_id=None):
+        """Queue a channel menu button click."""
+        self.record(EVENT_CLICK, item_id, user_id)
+
+    def record_publish(self, user_id=None):
+        """Queue a menu publication."""
+        self.record(EVENT_PUBLISH, None, user_id)
+
+    def start(self):
+        """Start the background writer."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background writer and write whatever is still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+        batch = []
+        while not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        if batch:
+            await self._write(batch)
+        await self.db.refresh_rollups()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = []
+            try:
+                batch.append(await self.queue.get())
+                deadline = loop.time() + self.flush_interval
+
+                while len(batch) < self.batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                await self._write(batch)
+            except asyncio.CancelledError:
+                # Put the batch back so stop() can still write it
+                for event in batch:
+                    with suppress(asyncio.QueueFull):
+                        self.queue.put_nowait(event)
+                raise
+            except Exception:
+                logging.exception("Failed to write %s analytics events", len(batch))
+                continue
+
+            # Keep the statistics rollups current so reads never scan raw events
+            try:
+                await self.db.refresh_rollups()
+            except Exception:
+                logging.exception("Failed to refresh analytics rollups")
+
+    async def _write(self, batch):
+        await self.db.insert_events(batch)
+        self.written += len(batch)
+
+    def stats(self):
+        """Get queue and throughput counters."""
+        return {'queued': self.queue.qsize(), 'written': self.written, 'dropped': self.dropped}
+
+
+# Shared recorder used by handlers, started and stopped in main.py
+analytics = EventRecorder()
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+from contextlib import suppress
+
+from bot.utils.analytics import analytics
+from bot.utils.publisher import publish_menu_to_channels
+from config import AUTO_PUBLISH, AUTO_PUBLISH_DELAY
+from database import Database
+
+
+class AutoPublisher:
+    """
+    Republishes the channel menu after menu changes.
+
+    Changes arriving within ``delay`` seconds of the first one are coalesced
+    into a single publish; only one publish runs at a time, and changes made
+    while it runs schedule exactly one more.
+    """
+
+    def __init__(self, db=None, delay=AUTO_PUBLISH_DELAY, enabled=AUTO_PUBLISH):
+        self.db = db or Database()
+        self.delay = delay
+        self.enabled = enabled
+        self.bot = None
+        self.requested = 0
+        self.published = 0
+        self._pending = False
+        self._task = None
+
+    def start(self, bot):
+        """Attach the bot used for publishing."""
+        self.bot = bot
+
+    def notify_changed(self):
+        """
+        Schedule a publish after a menu change.
+
+        Returns:
+            bool: True if the change will be published automatically
+        """
+        if not self.enabled or self.bot is None:
+            return False
+
+        self.requested += 1
+        self._pending = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return True
+
+    async def _run(self):
+        while self._pending:
+            await asyncio.sleep(self.delay)
+            await self._publish()
+
+    async def _publish(self):
+        self._pending = False
+        try:
+            snapshot = await self.db.get_menu_snapshot()
+            results = await publish_menu_to_channels(self.bot, self.db, snapshot.items)
+        except asyncio.CancelledError:
+            # Interrupted by stop(), which publishes again
+            self._pending = True
+            raise
+        except Exception:
+            logging.exception("Automatic menu publish failed")
+            return
+
+        for result in results:
+            if result.error is not None:
+                logging.error("Automatic menu publish to %s failed: %s", result.channel_id, result.error)
+            elif not result.unchanged:
+                self.published += 1
+                analytics.record_publish()
+
+    async def stop(self):
+        """Cancel the pending window and publish outstanding changes right away."""
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+        if self._pending:
+            await self._publish()
+
+
+# Shared publisher used by handlers, started and stopped in main.py
+auto_publisher = AutoPublisher()
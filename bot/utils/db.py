@@ -1,13 +1,23 @@
+from bot.utils.admins import admins
 from database import Database
 
 async def setup_database():
     """Initialize database and create default menu if needed."""
     db = Database()
     
+    # Open the shared connection used by every Database instance
+    await db.connect()
+    
     # Create tables if they don't exist
     await db.create_tables()
     
     # Initialize default menu items if none exist
     await db.initialize_default_menu()
     
+    # Warm the menu cache so the first clicks don't hit SQLite
+    await db.get_menu_snapshot()
+    
+    # Load admins granted through the bot
+    await admins.load()
+    
     return db
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import logging
+from collections import OrderedDict
+from contextlib import suppress
+from copy import copy
+
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder
+
+from config import FSM_CACHE_SIZE, FSM_FLUSH_INTERVAL
+from database import Database
+
+
+class _Record:
+    __slots__ = ('state', 'data')
+
+    def __init__(self, state=None, data=None):
+        self.state = state
+        self.data = data if data is not None else {}
+
+
+class SQLiteStorage(BaseStorage):
+    """
+    FSM storage persisted in the bot's SQLite database.
+
+    Reads and writes go to an in-memory LRU of records; changed records are
+    written back in batches every ``flush_interval`` seconds and on close.
+
+    The bot keeps FSM state only in private chats, so reads for other chats
+    (callback queries from channel menus, mostly) are answered with an empty
+    record without a query or an LRU slot; state set in such chats is only read
+    back while it is cached or waiting to be flushed.
+    """
+
+    def __init__(self, db=None, cache_size=FSM_CACHE_SIZE, flush_interval=FSM_FLUSH_INTERVAL,
+                 key_builder=None):
+        self.db = db or Database()
+        self.cache_size = cache_size
+        self.flush_interval = flush_interval
+        self.key_builder = key_builder or DefaultKeyBuilder(
+            with_bot_id=True,
+            with_business_connection_id=True,
+            with_destiny=True
+        )
+
+        self._records = OrderedDict()
+        self._dirty = {}
+        self._flush_task = None
+
+    async def _get_record(self, key, write=False):
+        storage_key = self.key_builder.build(key)
+        record = self._records.get(storage_key)
+
+        if record is not None:
+            self._records.move_to_end(storage_key)
+            return storage_key, record
+
+        pending = self._dirty.get(storage_key)
+        if pending is not None:
+            # Evicted before being flushed, the pending write is the latest value
+            record = _Record(pending[0], json.loads(pending[1]))
+        elif not write and key.chat_id != key.user_id:
+            return storage_key, _Record()
+        else:
+            row = await self.db.get_fsm_record(storage_key)
+            record = _Record(row['state'], json.loads(row['data'])) if row else _Record()
+
+        # Another coroutine may have loaded the same key while we were awaiting
+        record = self._records.setdefault(storage_key, record)
+        self._records.move_to_end(storage_key)
+        while len(self._records) > self.cache_size:
+            self._records.popitem(last=False)
+
+        return storage_key, record
+
+    def _mark_dirty(self, storage_key, record):
+        self._dirty[storage_key] = (record.state, json.dumps(record.data, ensure_ascii=False))
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        try:
+            await self.flush()
+        except Exception:
+            logging.exception("Failed to flush FSM storage")
+
+    async def flush(self):
+        """Write all changed records to the database in one transaction."""
+        if not self._dirty:
+            return
+
+        # Pending writes stay in _dirty, visible to reads of evicted keys, until committed
+        pending = dict(self._dirty)
+        await self.db.save_fsm_records(
+            [(key, state, data) for key, (state, data) in pending.items()]
+        )
+
+        # Drop the flushed writes unless newer ones replaced them meanwhile
+        for key, value in pending.items():
+            if self._dirty.get(key) is value:
+                del self._dirty[key]
+
+    async def set_state(self, key, state=None):
+        storage_key, record = await self._get_record(key, write=True)
+        record.state = state.state if isinstance(state, State) else state
+        self._mark_dirty(storage_key, record)
+
+    async def get_state(self, key):
+        _, record = await self._get_record(key)
+        return record.state
+
+    async def set_data(self, key, data):
+        if not isinstance(data, dict):
+            msg = f"Data must be a dict or dict-like object, got {type(data).__name__}"
+            raise DataNotDictLikeError(msg)
+
+        storage_key, record = await self._get_record(key, write=True)
+        record.data = data.copy()
+        self._mark_dirty(storage_key, record)
+
+    async def get_data(self, key):
+        _, record = await self._get_record(key)
+        return record.data.copy()
+
+    async def get_value(self, storage_key, dict_key, default=None):
+        _, record = await self._get_record(storage_key)
+        return copy(record.data.get(dict_key, default))
+
+    async def close(self):
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._flush_task
+        await self.flush()
@@ -0,0 +1,18 @@
+import asyncio
+import logging
+
+from config import PRICE_COMPACTION_INTERVAL, PRICE_HISTORY_LIMIT
+from database import Database
+
+
+async def run_price_compaction(db=None, interval=PRICE_COMPACTION_INTERVAL, keep=PRICE_HISTORY_LIMIT):
+    """Periodically trim price_posts to the configured number of versions per item."""
+    db = db or Database()
+    while True:
+        try:
+            deleted = await db.compact_price_posts(keep)
+            if deleted:
+                logging.info("Compacted price_posts: removed %s old versions", deleted)
+        except Exception:
+            logging.exception("Failed to compact price_posts")
+        await asyncio.sleep(interval)
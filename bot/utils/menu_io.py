@@ -0,0 +1,233 @@
+import json
+import re
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+from database.defaults import ITEM_TYPES, MAX_ITEM_CONTENT_LENGTH
+
+DOCUMENT_VERSION = 1
+
+# Links accepted by the admin panel; contacts may also be an @username
+TELEGRAM_URL_RE = re.compile(r'https?://t\.me/[^\s<>"&]+')
+USERNAME_RE = re.compile(r'@[A-Za-z][A-Za-z0-9_]{3,31}')
+
+# Timestamps as SQLite's CURRENT_TIMESTAMP writes them, so they sort as text
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+TIMESTAMP_RE = re.compile(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}')
+
+# Fields compared when showing what an import would change
+DIFF_FIELDS = ('type', 'title', 'url', 'position', 'is_dynamic', 'content')
+
+
+class MenuImportError(ValueError):
+    """Raised when an imported menu document is malformed."""
+
+
+class MenuDocument(NamedTuple):
+    """Validated menu document, ready for ``Database.replace_menu``."""
+
+    items: list
+    contents: list
+    price_posts: list
+
+
+async def export_menu_document(db):
+    """
+    Build a JSON-serializable document of the whole menu.
+
+    Args:
+        db: Database instance
+
+    Returns:
+        dict: Menu items with their click answers and price post history
+    """
+    items, contents, price_posts = await db.export_menu()
+    content_by_item = {row['item_id']: row['content'] for row in contents}
+    posts_by_item = {}
+    for row in price_posts:
+        posts_by_item.setdefault(row['item_id'], []).append(
+            {'post_url': row['post_url'], 'updated_at': row['updated_at']}
+        )
+
+    return {
+        'version': DOCUMENT_VERSION,
+        'exported_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'items': [
+            {
+                'id': item['id'],
+                'type': item['type'],
+                'title': item['title'],
+                'url': item['url'],
+                'position': item['position'],
+                'is_dynamic': bool(item['is_dynamic']),
+                'content': content_by_item.get(item['id']),
+                'price_posts': posts_by_item.get(item['id'], [])
+            }
+            for item in items
+        ]
+    }
+
+
+def dump_menu_document(document):
+    """Serialize a menu document to UTF-8 JSON bytes."""
+    return json.dumps(document, ensure_ascii=False, indent=2).encode()
+
+
+def _require(condition, message):
+    if not condition:
+        raise MenuImportError(message)
+
+
+def _optional_str(value):
+    return value is None or isinstance(value, str)
+
+
+def _valid_url(url, item_type=None):
+    if not url:
+        return True
+    if TELEGRAM_URL_RE.fullmatch(url):
+        return True
+    return item_type == 'contact' and USERNAME_RE.fullmatch(url) is not None
+
+
+def _valid_timestamp(value):
+    if value is None:
+        return True
+    if not TIMESTAMP_RE.fullmatch(value):
+        return False
+    try:
+        datetime.strptime(value, TIMESTAMP_FORMAT)
+    except ValueError:
+        return False
+    return True
+
+
+def parse_menu_document(raw):
+    """
+    Parse and validate an exported menu document.
+
+    Args:
+        raw: JSON text or bytes
+
+    Returns:
+        MenuDocument: Rows to write
+
+    Raises:
+        MenuImportError: If the document is not a valid menu export
+    """
+    try:
+        document = json.loads(raw)
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise MenuImportError(f"не удалось разобрать JSON: {e}") from e
+
+    _require(isinstance(document, dict), "документ должен быть JSON-объектом")
+    _require(document.get('version') == DOCUMENT_VERSION,
+             f"неподдерживаемая версия документа: {document.get('version')!r}")
+    entries = document.get('items')
+    _require(isinstance(entries, list) and entries, "список items пуст или отсутствует")
+
+    items, contents, price_posts = [], [], []
+    seen_ids = set()
+    for number, entry in enumerate(entries, 1):
+        where = f"пункт #{number}"
+        _require(isinstance(entry, dict), f"{where}: ожидался объект")
+
+        item_id = entry.get('id')
+        _require(isinstance(item_id, int) and not isinstance(item_id, bool) and item_id > 0,
+                 f"{where}: id должен быть положительным целым числом")
+        _require(item_id not in seen_ids, f"{where}: повторяющийся id {item_id}")
+        seen_ids.add(item_id)
+
+        _require(entry.get('type') in ITEM_TYPES, f"{where}: type должен быть одним из {', '.join(ITEM_TYPES)}")
+        title = entry.get('title')
+        _require(isinstance(title, str) and title.strip(), f"{where}: title не может быть пустым")
+        url = entry.get('url')
+        _require(_optional_str(url), f"{where}: url должен быть строкой")
+        _require(_valid_url(url, entry['type']),
+                 f"{where}: url должен начинаться с https://t.me/"
+                 + (" или быть @username" if entry['type'] == 'contact' else ""))
+        position = entry.get('position')
+        _require(isinstance(position, int) and not isinstance(position, bool),
+                 f"{where}: position должен быть целым числом")
+        is_dynamic = entry.get('is_dynamic', False)
+        _require(isinstance(is_dynamic, bool), f"{where}: is_dynamic должен быть true или false")
+
+        content = entry.get('content')
+        _require(_optional_str(content), f"{where}: content должен быть строкой")
+        _require(not content or len(content) <= MAX_ITEM_CONTENT_LENGTH,
+                 f"{where}: content длиннее {MAX_ITEM_CONTENT_LENGTH} символов")
+
+        posts = entry.get('price_posts', [])
+        _require(isinstance(posts, list), f"{where}: price_posts должен быть списком")
+        _require(not posts or is_dynamic, f"{where}: price_posts допустимы только у динамических пунктов")
+        for post in posts:
+            _require(isinstance(post, dict) and isinstance(post.get('post_url'), str)
+                     and _optional_str(post.get('updated_at')),
+                     f"{where}: некорректная запись price_posts")
+            _require(_valid_url(post['post_url']),
+                     f"{where}: post_url должен начинаться с https://t.me/")
+            _require(_valid_timestamp(post.get('updated_at')),
+                     f"{where}: updated_at должен быть в формате ГГГГ-ММ-ДД ЧЧ:ММ:СС или null")
+            price_posts.append((item_id, post['post_url'], post.get('updated_at')))
+
+        items.append((item_id, entry['type'], title, url, position, is_dynamic))
+        if content:
+            contents.append((item_id, content))
+
+    return MenuDocument(items, contents, price_posts)
+
+
+def _describe_items(items, contents, price_posts):
+    content_by_item = dict(contents)
+    post_counts = {}
+    for item_id, *_ in price_posts:
+        post_counts[item_id] = post_counts.get(item_id, 0) + 1
+
+    return {
+        item_id: {
+            'type': type,
+            'title': title,
+            'url': url or None,
+            'position': position,
+            'is_dynamic': bool(is_dynamic),
+            'content': content_by_item.get(item_id),
+            'price_posts': post_counts.get(item_id, 0)
+        }
+        for item_id, type, title, url, position, is_dynamic in items
+    }
+
+
+async def diff_menu_document(db, document):
+    """
+    Compare an imported document with the current menu without writing anything.
+
+    Args:
+        db: Database instance
+        document: MenuDocument to compare
+
+    Returns:
+        list: Human-readable lines, one per added, removed or changed item
+    """
+    items, contents, price_posts = await db.export_menu()
+    current = _describe_items(
+        [(row['id'], row['type'], row['title'], row['url'], row['position'], row['is_dynamic']) for row in items],
+        [(row['item_id'], row['content']) for row in contents],
+        [tuple(row) for row in price_posts]
+    )
+    incoming = _describe_items(*document)
+
+    lines = []
+    for item_id, item in incoming.items():
+        old = current.get(item_id)
+        if old is None:
+            lines.append(f"+ #{item_id} {item['title']}")
+            continue
+        changed = [field for field in DIFF_FIELDS if old[field] != item[field]]
+        if old['price_posts'] != item['price_posts']:
+            changed.append(f"price_posts {old['price_posts']}→{item['price_posts']}")
+        if changed:
+            lines.append(f"~ #{item_id} {item['title']}: {', '.join(changed)}")
+    for item_id, item in current.items():
+        if item_id not in incoming:
+            lines.append(f"- #{item_id} {item['title']}")
+    return lines
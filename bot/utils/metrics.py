@@ -0,0 +1,301 @@
+import logging
+import time
+from bisect import bisect_left
+
+from aiohttp import web
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.types import CallbackQuery, Message
+
+from bot.utils.profiling import slow_log
+from config import METRICS_HOST, METRICS_PORT
+
+# Latency buckets in seconds, from a cached lookup to a slow Bot API round trip
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        """Add ``amount`` to the series identified by ``labels``."""
+        key = tuple(labels[name] for name in self.labelnames)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        for key, value in self._values.items():
+            yield self.name, tuple(zip(self.labelnames, key)), value
+
+
+class Histogram:
+    """Cumulative histogram with labels, in Prometheus bucket layout."""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, value, **labels):
+        """Record one observation in the series identified by ``labels``."""
+        key = tuple(labels[name] for name in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            # Per-bucket counts plus +Inf, then the running sum
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def samples(self):
+        for key, (counts, total) in self._series.items():
+            labels = tuple(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                yield f'{self.name}_bucket', labels + (('le', _format_value(bound)),), cumulative
+            yield f'{self.name}_sum', labels, total
+            yield f'{self.name}_count', labels, cumulative
+
+
+class Gauge:
+    """Value read from a callback at scrape time."""
+
+    type = 'gauge'
+
+    def __init__(self, name, documentation, callback):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+
+    def samples(self):
+        value = self.callback()
+        if value is not None:
+            yield self.name, (), value
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        """Add a metric, replacing any earlier metric with the same name."""
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, callback):
+        return self.register(Gauge(name, documentation, callback))
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                samples = list(metric.samples())
+            except Exception:
+                logging.exception("Failed to collect metric %s", metric.name)
+                continue
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for name, labels, value in samples:
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+# Shared registry exposed on /metrics
+registry = MetricsRegistry()
+
+UPDATE_LATENCY = registry.histogram(
+    'bot_update_duration_seconds', 'Time spent handling an update.', ('event', 'handler', 'prefix')
+)
+UPDATES = registry.counter(
+    'bot_updates_total', 'Updates processed, by outcome.', ('event', 'handler', 'prefix', 'status')
+)
+DB_QUERY_LATENCY = registry.histogram(
+    'db_query_duration_seconds', 'Time spent in Database methods.', ('query',)
+)
+DB_QUERY_ERRORS = registry.counter(
+    'db_query_errors_total', 'Database methods that raised.', ('query',)
+)
+BOT_API_LATENCY = registry.histogram(
+    'bot_api_request_duration_seconds', 'Bot API request round trip, per attempt.', ('method',)
+)
+BOT_API_REQUESTS = registry.counter(
+    'bot_api_requests_total', 'Bot API requests, per attempt.', ('method',)
+)
+BOT_API_ERRORS = registry.counter(
+    'bot_api_errors_total', 'Bot API requests that failed.', ('method', 'error')
+)
+
+
+def get_event_prefix(event):
+    """Get a low-cardinality label for an event: callback data prefix or command."""
+    if isinstance(event, CallbackQuery):
+        return (event.data or '').split(':', 1)[0]
+    if isinstance(event, Message):
+        text = event.text or event.caption or ''
+        if text.startswith('/'):
+            return text.split(maxsplit=1)[0].split('@', 1)[0]
+        return getattr(event.content_type, 'value', event.content_type)
+    return ''
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """
+    Outer update middleware recording handling time per handler and callback prefix.
+
+    Every update also goes into the slow log shown by /slowlog.
+
+    The handler that ran is reported back by the inner half of the middleware,
+    which aiogram only calls once filters have picked a handler.
+    """
+
+    def setup(self, dp):
+        """Register on a dispatcher: outer on updates, inner on messages and callbacks."""
+        dp.update.outer_middleware(self)
+        dp.message.middleware(self._label_handler)
+        dp.callback_query.middleware(self._label_handler)
+
+    async def __call__(self, handler, event, data):
+        labels = {'event': event.event_type, 'handler': 'unhandled', 'prefix': get_event_prefix(event.event)}
+        data['metrics_labels'] = labels
+        status = 'ok'
+        started = time.perf_counter()
+        try:
+            result = await handler(event, data)
+            if result is UNHANDLED:
+                status = 'unhandled'
+            return result
+        except Exception:
+            status = 'error'
+            raise
+        finally:
+            if labels['handler'] == 'unhandled':
+                # Unmatched commands and callback data are arbitrary user input
+                labels['prefix'] = ''
+            elapsed = time.perf_counter() - started
+            UPDATE_LATENCY.observe(elapsed, **labels)
+            UPDATES.inc(status=status, **labels)
+            user = data.get('event_from_user')
+            slow_log.record(elapsed, user_id=user.id if user else None, status=status, **labels)
+
+    @staticmethod
+    async def _label_handler(handler, event, data):
+        labels = data.get('metrics_labels')
+        if labels is not None:
+            labels['handler'] = data['handler'].callback.__name__
+        return await handler(event, data)
+
+
+class BotApiMetricsMiddleware(BaseRequestMiddleware):
+    """Session middleware counting Bot API requests, errors and latency per method."""
+
+    async def __call__(self, make_request, bot, method):
+        name = type(method).__name__
+        BOT_API_REQUESTS.inc(method=name)
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            BOT_API_ERRORS.inc(method=name, error=type(e).__name__)
+            raise
+        finally:
+            BOT_API_LATENCY.observe(time.perf_counter() - started, method=name)
+
+
+def observe_query(name, elapsed, failed):
+    """Database query observer feeding the query metrics."""
+    DB_QUERY_LATENCY.observe(elapsed, query=name)
+    if failed:
+        DB_QUERY_ERRORS.inc(query=name)
+
+
+def register_stats(prefix, documentation, stats):
+    """Expose every numeric value of a ``stats()`` callable as a gauge."""
+    for key, value in stats().items():
+        if isinstance(value, (int, float)):
+            registry.gauge(
+                f'{prefix}_{key}', f'{documentation}: {key}.',
+                lambda key=key: stats().get(key)
+            )
+
+
+def setup_metrics(dp, bot, db, rate_limiter=None, recorder=None):
+    """
+    Instrument the dispatcher, Bot API session and database.
+
+    Args:
+        dp: Dispatcher to time updates on
+        bot: Bot whose session requests are counted
+        db: Database whose menu cache counters are exported
+        rate_limiter: Optional RateLimitMiddleware whose scheduler stats are exported
+        recorder: Optional EventRecorder whose queue stats are exported
+    """
+    MetricsMiddleware().setup(dp)
+    bot.session.middleware(BotApiMetricsMiddleware())
+    db.add_query_observer(observe_query)
+
+    register_stats('menu_cache', 'Menu snapshot cache', db.cache.stats)
+    if rate_limiter is not None:
+        register_stats('bot_api_scheduler', 'Bot API request scheduler', rate_limiter.stats)
+    if recorder is not None:
+        register_stats('analytics_events', 'Analytics event recorder', recorder.stats)
+
+
+def build_metrics_app():
+    """Create the aiohttp application serving /metrics."""
+    async def handle_metrics(request):
+        return web.Response(body=registry.render().encode(), headers={'Content-Type': CONTENT_TYPE})
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle_metrics)
+    return app
+
+
+async def start_metrics_server(host=METRICS_HOST, port=METRICS_PORT):
+    """Serve /metrics in the background; returns the AppRunner, or None when disabled."""
+    if not port:
+        return None
+
+    runner = web.AppRunner(build_metrics_app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logging.info("Serving metrics on http://%s:%s/metrics", host, port)
+    return runner
@@ -0,0 +1,146 @@
+import asyncio
+import cProfile
+import io
+import os
+import pstats
+import selectors
+import time
+from collections import deque
+from contextlib import suppress
+from datetime import datetime
+from typing import NamedTuple
+
+from config import PROFILE_DIR, PROFILE_KEEP, PROFILE_TOP_N, SLOWLOG_SIZE
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Event loop plumbing and idle polling, left out of the summary (still in the .pstats file)
+_LOOP_FILES = (os.path.dirname(asyncio.__file__), selectors.__file__)
+_LOOP_BUILTINS = ("<method 'poll' of", "<method 'select' of", "<method 'control' of", "<method 'run' of '_contextvars")
+
+
+class ProfileResult(NamedTuple):
+    """Outcome of a profiling window."""
+
+    path: str
+    seconds: float
+    summary: str
+
+
+class Profiler:
+    """
+    cProfile session over the event loop thread, one window at a time.
+
+    Everything the loop runs while the window is open is profiled, which
+    covers handler execution as well as the middlewares and I/O around it.
+    """
+
+    def __init__(self, directory=PROFILE_DIR, top_n=PROFILE_TOP_N, keep=PROFILE_KEEP):
+        self.directory = directory
+        self.top_n = top_n
+        self.keep = keep
+        self._profile = None
+
+    @property
+    def active(self):
+        """Check whether a profiling window is open."""
+        return self._profile is not None
+
+    async def run(self, seconds):
+        """
+        Profile the process for ``seconds`` and write the stats to a .pstats file.
+
+        Only the newest ``keep`` stats files are kept in the directory.
+
+        Args:
+            seconds: Length of the profiling window
+
+        Returns:
+            ProfileResult: Stats file path and a top-N summary by cumulative time
+
+        Raises:
+            RuntimeError: If another profiling window is already open
+        """
+        if self._profile is not None:
+            raise RuntimeError("profiling is already running")
+
+        self._profile = profile = cProfile.Profile()
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profile.disable()
+            self._profile = None
+        elapsed = time.perf_counter() - started
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}.pstats")
+        profile.dump_stats(path)
+        self.prune()
+
+        return ProfileResult(path, elapsed, self.summarize(profile))
+
+    def prune(self):
+        """Delete all but the newest ``keep`` stats files; names sort by their timestamp."""
+        names = sorted(
+            name for name in os.listdir(self.directory)
+            if name.startswith("profile-") and name.endswith(".pstats")
+        )
+        for name in names[:max(len(names) - self.keep, 0)]:
+            with suppress(FileNotFoundError):
+                os.remove(os.path.join(self.directory, name))
+
+    def summarize(self, profile):
+        """Get the top functions by cumulative time as a fixed-width table."""
+        stats = pstats.Stats(profile, stream=io.StringIO())
+        rows = sorted(
+            (entry for entry in stats.stats.items() if not self._is_loop_frame(*entry[0])),
+            key=lambda entry: entry[1][3],
+            reverse=True
+        )
+
+        lines = [f"{'cum ms':>9} {'own ms':>8} {'calls':>7}  function"]
+        for (filename, line, name), (_, calls, own, cumulative, _) in rows[:self.top_n]:
+            if filename.startswith(ROOT_DIR):
+                filename = os.path.relpath(filename, ROOT_DIR)
+            else:
+                filename = os.path.basename(filename)
+            lines.append(f"{cumulative * 1000:>9.1f} {own * 1000:>8.1f} {calls:>7}  {filename}:{line}({name})")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _is_loop_frame(filename, line, name):
+        return filename.startswith(_LOOP_FILES) or name.startswith(_LOOP_BUILTINS)
+
+
+class SlowLogEntry(NamedTuple):
+    """One handled update, as recorded by the metrics middleware."""
+
+    timestamp: float
+    duration: float
+    event: str
+    handler: str
+    prefix: str
+    user_id: int
+    status: str
+
+
+class SlowLog:
+    """Ring buffer of recently handled updates, queried for the slowest ones."""
+
+    def __init__(self, size=SLOWLOG_SIZE):
+        self.entries = deque(maxlen=size)
+
+    def record(self, duration, event, handler, prefix, user_id=None, status='ok'):
+        """Remember a handled update."""
+        self.entries.append(SlowLogEntry(time.time(), duration, event, handler, prefix, user_id, status))
+
+    def slowest(self, limit=15):
+        """Get the slowest recent updates, slowest first."""
+        return sorted(self.entries, key=lambda entry: entry.duration, reverse=True)[:limit]
+
+
+# Shared instances used by the admin commands and the metrics middleware
+profiler = Profiler()
+slow_log = SlowLog()
@@ -0,0 +1,180 @@
+import asyncio
+import hashlib
+import logging
+from typing import NamedTuple, Optional
+
+from aiogram.exceptions import TelegramBadRequest
+
+from bot.keyboards import compile_channel_menu_keyboard
+from config import CHANNEL_IDS, PUBLISH_CONCURRENCY
+
+MENU_TEXT = (
+    "🛍️ <b>АКТУАЛЬНЫЕ ЦЕНЫ</b> 🛍️\n\n"
+    "Выберите интересующий вас раздел:"
+)
+
+# Bad Request descriptions meaning the pinned menu message is gone for good
+MISSING_MESSAGE_ERRORS = (
+    "message to edit not found",
+    "message can't be edited",
+    "message_id_invalid",
+)
+
+
+# Manual and automatic publishes must not race to post a second menu message
+_publish_locks = {}
+
+
+class PublishResult(NamedTuple):
+    """Outcome of publishing the menu to one channel."""
+
+    channel_id: str
+    message_id: Optional[int]
+    is_new: bool
+    is_pinned: bool
+    unchanged: bool
+    latency: float
+    error: Optional[Exception] = None
+
+
+def compute_menu_hash(text, keyboard_payload):
+    """Hash the rendered menu text and serialized keyboard."""
+    return hashlib.sha256((text + keyboard_payload).encode()).hexdigest()
+
+
+def is_not_modified_error(error):
+    """Check whether Telegram rejected an edit because nothing changed."""
+    return "message is not modified" in error.message.lower()
+
+
+def is_missing_message_error(error):
+    """Check whether Telegram rejected an edit because the message no longer exists."""
+    message = error.message.lower()
+    return any(marker in message for marker in MISSING_MESSAGE_ERRORS)
+
+
+async def publish_channel_menu(bot, db, menu_items, channel_id, force=False):
+    """
+    Publish the menu to a channel, editing the existing message when possible.
+
+    The keyboard follows the channel's layout from menu_layouts. The hash of
+    the rendered menu is stored in the channel's menu_config row, so publishing
+    unchanged content skips the Bot API entirely unless ``force`` is set.
+
+    Args:
+        bot: Bot instance
+        db: Database instance
+        menu_items: Menu items with resolved price URLs
+        channel_id: Channel to publish to
+        force: Ignore the stored hash and go to Telegram, reposting a deleted menu
+
+    Returns:
+        PublishResult: Message ID and what happened to it
+    """
+    lock = _publish_locks.setdefault(channel_id, asyncio.Lock())
+    async with lock:
+        return await _publish_channel_menu(bot, db, menu_items, channel_id, force)
+
+
+async def publish_menu_to_channels(bot, db, menu_items, channel_ids=None, concurrency=PUBLISH_CONCURRENCY,
+                                   force=False):
+    """
+    Publish the menu to several channels concurrently.
+
+    Failures are reported per channel instead of aborting the other publishes.
+
+    Args:
+        bot: Bot instance
+        db: Database instance
+        menu_items: Menu items with resolved price URLs
+        channel_ids: Target channels, defaults to CHANNEL_IDS from config
+        concurrency: Maximum number of channels published at the same time
+        force: Ignore the stored hashes, see publish_channel_menu()
+
+    Returns:
+        list: PublishResult for every channel, in the order of channel_ids
+    """
+    if channel_ids is None:
+        channel_ids = CHANNEL_IDS
+    semaphore = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+
+    async def publish_one(channel_id):
+        async with semaphore:
+            started = loop.time()
+            try:
+                return await publish_channel_menu(bot, db, menu_items, channel_id, force)
+            except Exception as e:
+                logging.exception("Failed to publish menu to %s", channel_id)
+                return PublishResult(channel_id, None, False, False, False, loop.time() - started, e)
+
+    return await asyncio.gather(*(publish_one(channel_id) for channel_id in channel_ids))
+
+
+async def _publish_channel_menu(bot, db, menu_items, channel_id, force):
+    started = asyncio.get_running_loop().time()
+
+    def result(message_id, is_new, is_pinned, unchanged):
+        latency = asyncio.get_running_loop().time() - started
+        return PublishResult(channel_id, message_id, is_new, is_pinned, unchanged, latency)
+
+    layout = await db.get_menu_layout(channel_id)
+    keyboard, keyboard_payload = compile_channel_menu_keyboard(menu_items, layout)
+    content_hash = compute_menu_hash(MENU_TEXT, keyboard_payload)
+
+    config = await db.get_menu_config(channel_id)
+    is_pinned = config['is_pinned'] if config else True
+
+    if config and config['menu_message_id']:
+        message_id = config['menu_message_id']
+
+        if not force and config['content_hash'] == content_hash:
+            return result(message_id, False, is_pinned, True)
+
+        try:
+            await bot.edit_message_text(
+                chat_id=channel_id,
+                message_id=message_id,
+                text=MENU_TEXT,
+                reply_markup=keyboard
+            )
+            is_new = False
+        except TelegramBadRequest as e:
+            if is_not_modified_error(e):
+                is_new = False
+            elif is_missing_message_error(e):
+                # The old menu was deleted, post a fresh one
+                message = await bot.send_message(
+                    chat_id=channel_id,
+                    text=MENU_TEXT,
+                    reply_markup=keyboard
+                )
+                message_id = message.message_id
+                is_new = True
+            else:
+                raise
+    else:
+        message = await bot.send_message(
+            chat_id=channel_id,
+            text=MENU_TEXT,
+            reply_markup=keyboard
+        )
+        message_id = message.message_id
+        is_new = True
+
+    # Pin message if needed
+    if is_pinned and is_new:
+        await bot.pin_chat_message(
+            chat_id=channel_id,
+            message_id=message_id,
+            disable_notification=True
+        )
+
+    await db.update_menu_config(
+        message_id=message_id,
+        channel_id=channel_id,
+        is_pinned=is_pinned,
+        content_hash=content_hash
+    )
+
+    return result(message_id, is_new, is_pinned, False)
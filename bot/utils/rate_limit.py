@@ -0,0 +1,286 @@
+import asyncio
+import itertools
+import logging
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import (
+    AnswerCallbackQuery,
+    DeleteWebhook,
+    EditMessageCaption,
+    EditMessageReplyMarkup,
+    EditMessageText,
+    GetMe,
+    GetUpdates,
+    GetWebhookInfo,
+    SetWebhook
+)
+
+from config import (
+    RATE_LIMIT_GLOBAL,
+    RATE_LIMIT_CALLBACK_ANSWERS,
+    RATE_LIMIT_PRIVATE_PER_SECOND,
+    RATE_LIMIT_GROUP_PER_MINUTE,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_MAX_RETRIES,
+    RATE_LIMIT_MAX_RETRY_AFTER
+)
+
+# Priority lanes, lower value goes first
+PRIORITY_HIGH = 0  # admin UI replies and callback answers
+PRIORITY_LOW = 1   # channel publishes
+
+# Shared buckets: sending methods draw from the global one, callback answers
+# don't count toward Telegram's broadcast limit and get their own
+SHARED_GLOBAL = 'global'
+SHARED_ANSWERS = 'answers'
+
+# Methods that don't send anything to chats and bypass the scheduler
+EXEMPT_METHODS = (GetUpdates, GetMe, DeleteWebhook, SetWebhook, GetWebhookInfo)
+
+# Edits in place; in private chats (the admin panel) they skip the per-chat bucket
+EDIT_METHODS = (EditMessageText, EditMessageReplyMarkup, EditMessageCaption)
+
+# Idle per-chat buckets are pruned once there are more than this many
+MAX_CHAT_BUCKETS = 1000
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate`` tokens per second."""
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+        self.blocked_until = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now):
+        """Get seconds until a token is available."""
+        self._refill(now)
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+
+    def consume(self, now):
+        """Take one token."""
+        self._refill(now)
+        self.tokens -= 1
+
+    def block(self, until):
+        """Stop handing out tokens until the given time (after a RetryAfter)."""
+        self.blocked_until = max(self.blocked_until, until)
+        self.tokens = 0
+
+    def is_idle(self, now):
+        """Check whether the bucket is full and not blocked."""
+        self._refill(now)
+        return self.tokens >= self.capacity and self.blocked_until <= now
+
+
+class _Waiter:
+    __slots__ = ('priority', 'seq', 'chat_id', 'shared', 'future', 'enqueued_at')
+
+    def __init__(self, priority, seq, chat_id, shared, future, enqueued_at):
+        self.priority = priority
+        self.seq = seq
+        self.chat_id = chat_id
+        self.shared = shared
+        self.future = future
+        self.enqueued_at = enqueued_at
+
+
+class RequestScheduler:
+    """
+    Hands out permission to call the Bot API within Telegram's flood limits.
+
+    A global bucket caps the overall rate and per-chat buckets cap each chat;
+    callback answers draw from a separate shared bucket instead of the global one.
+    Among requests that may go right now, high-priority ones are served first.
+    """
+
+    def __init__(self, global_rate=RATE_LIMIT_GLOBAL,
+                 answer_rate=RATE_LIMIT_CALLBACK_ANSWERS,
+                 private_rate=RATE_LIMIT_PRIVATE_PER_SECOND,
+                 group_rate_per_minute=RATE_LIMIT_GROUP_PER_MINUTE,
+                 burst=RATE_LIMIT_BURST):
+        self.global_rate = global_rate
+        self.answer_rate = answer_rate
+        self.private_rate = private_rate
+        self.group_rate = group_rate_per_minute / 60
+        self.burst = burst
+
+        self._shared = {}
+        self._chats = {}
+        self._waiters = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._pump_task = None
+
+        # Metrics
+        self.granted = 0
+        self.max_queue_depth = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _now(self):
+        return asyncio.get_running_loop().time()
+
+    def _shared_bucket(self, shared, now):
+        bucket = self._shared.get(shared)
+        if bucket is None:
+            rate = self.answer_rate if shared == SHARED_ANSWERS else self.global_rate
+            bucket = self._shared[shared] = TokenBucket(rate, rate, now)
+        return bucket
+
+    def _chat_bucket(self, chat_id, now):
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= MAX_CHAT_BUCKETS:
+                self._prune(now)
+            # Positive IDs are private chats, everything else is a group or channel
+            is_private = isinstance(chat_id, int) and chat_id > 0
+            rate = self.private_rate if is_private else self.group_rate
+            bucket = self._chats[chat_id] = TokenBucket(rate, self.burst, now)
+        return bucket
+
+    def _prune(self, now):
+        for chat_id, bucket in list(self._chats.items()):
+            if bucket.is_idle(now):
+                del self._chats[chat_id]
+
+    async def acquire(self, chat_id=None, priority=PRIORITY_LOW, shared=SHARED_GLOBAL):
+        """Wait until a request to ``chat_id`` may be sent."""
+        now = self._now()
+        future = asyncio.get_running_loop().create_future()
+        waiter = _Waiter(priority, next(self._seq), chat_id, shared, future, now)
+
+        self._waiters.append(waiter)
+        self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+        self._wakeup.set()
+
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump())
+
+        try:
+            await future
+        finally:
+            if not future.done():
+                future.cancel()
+
+        wait = self._now() - waiter.enqueued_at
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    async def _pump(self):
+        while self._waiters:
+            self._wakeup.clear()
+            self._waiters = [w for w in self._waiters if not w.future.done()]
+            if not self._waiters:
+                break
+
+            now = self._now()
+            shared_delays = {}
+            ready = None
+            timeout = None
+            for waiter in self._waiters:
+                delay = shared_delays.get(waiter.shared)
+                if delay is None:
+                    delay = shared_delays[waiter.shared] = self._shared_bucket(waiter.shared, now).delay(now)
+                if delay <= 0 and waiter.chat_id is not None:
+                    delay = self._chat_bucket(waiter.chat_id, now).delay(now)
+
+                if delay > 0:
+                    timeout = delay if timeout is None else min(timeout, delay)
+                elif ready is None or (waiter.priority, waiter.seq) < (ready.priority, ready.seq):
+                    ready = waiter
+
+            if ready is not None:
+                self._waiters.remove(ready)
+                self._shared_bucket(ready.shared, now).consume(now)
+                if ready.chat_id is not None:
+                    self._chat_bucket(ready.chat_id, now).consume(now)
+                self.granted += 1
+                ready.future.set_result(None)
+                continue
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def penalize(self, chat_id, retry_after, shared=SHARED_GLOBAL):
+        """Hold back requests after Telegram answered with RetryAfter."""
+        now = self._now()
+        if chat_id is not None:
+            self._chat_bucket(chat_id, now).block(now + retry_after)
+        else:
+            self._shared_bucket(shared, now).block(now + retry_after)
+        self._wakeup.set()
+
+    def stats(self):
+        """Get queue depth and wait time metrics."""
+        return {
+            'queue_depth': len(self._waiters),
+            'max_queue_depth': self.max_queue_depth,
+            'granted': self.granted,
+            'avg_wait': self.total_wait / self.granted if self.granted else 0.0,
+            'max_wait': self.max_wait,
+        }
+
+
+class RateLimitMiddleware(BaseRequestMiddleware):
+    """
+    Session middleware that routes Bot API calls through a RequestScheduler
+    and retries calls rejected with RetryAfter.
+    """
+
+    def __init__(self, scheduler=None, max_retries=RATE_LIMIT_MAX_RETRIES,
+                 max_retry_after=RATE_LIMIT_MAX_RETRY_AFTER):
+        self.scheduler = scheduler or RequestScheduler()
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
+        self.retries = 0
+
+    @staticmethod
+    def classify(method):
+        """Get the per-chat bucket, priority lane and shared bucket for a Bot API method."""
+        if isinstance(method, AnswerCallbackQuery):
+            return None, PRIORITY_HIGH, SHARED_ANSWERS
+        chat_id = getattr(method, 'chat_id', None)
+        if isinstance(chat_id, int) and chat_id > 0:
+            if isinstance(method, EDIT_METHODS):
+                return None, PRIORITY_HIGH, SHARED_GLOBAL
+            return chat_id, PRIORITY_HIGH, SHARED_GLOBAL
+        return chat_id, PRIORITY_LOW, SHARED_GLOBAL
+
+    async def __call__(self, make_request, bot, method):
+        if isinstance(method, EXEMPT_METHODS):
+            return await make_request(bot, method)
+
+        chat_id, priority, shared = self.classify(method)
+
+        attempt = 0
+        while True:
+            await self.scheduler.acquire(chat_id, priority, shared)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                if attempt >= self.max_retries or e.retry_after > self.max_retry_after:
+                    raise
+                attempt += 1
+                self.retries += 1
+                logging.warning(
+                    "Flood control on %s (chat %s), retrying in %s s",
+                    type(method).__name__, chat_id, e.retry_after
+                )
+                self.scheduler.penalize(chat_id, e.retry_after, shared)
+
+    def stats(self):
+        """Get scheduler metrics together with the retry counter."""
+        return {**self.scheduler.stats(), 'retries': self.retries}
@@ -0,0 +1,50 @@
+import logging
+import time
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.methods import GetUpdates
+
+
+class StartupTimeline:
+    """
+    Milestones from process start until the bot is ready for updates.
+
+    Offsets are measured from ``started``, which main.py takes before its
+    imports so that import time shows up as the first stage.
+    """
+
+    def __init__(self, started=None):
+        self.started = started if started is not None else time.perf_counter()
+        self.stages = []
+        self._last = self.started
+
+    def mark(self, stage):
+        """Record the end of a startup stage."""
+        now = time.perf_counter()
+        self.stages.append((stage, now - self._last))
+        self._last = now
+
+    @property
+    def total(self):
+        """Seconds from process start to the last recorded stage."""
+        return self._last - self.started
+
+    def log(self):
+        """Log every stage with its duration and the total startup time."""
+        stages = ", ".join(f"{stage} {seconds * 1000:.0f} ms" for stage, seconds in self.stages)
+        logging.info("Startup took %.0f ms: %s", self.total * 1000, stages)
+
+
+class FirstPollMiddleware(BaseRequestMiddleware):
+    """Session middleware closing the startup timeline when the first getUpdates request goes out."""
+
+    def __init__(self, timeline):
+        self.timeline = timeline
+        self.done = False
+
+    async def __call__(self, make_request, bot, method):
+        if not self.done and isinstance(method, GetUpdates):
+            self.done = True
+            self.timeline.mark("first poll")
+            self.timeline.log()
+        return await make_request(bot, method)
@@ -0,0 +1,62 @@
+import asyncio
+import logging
+
+from aiohttp import web
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+from config import (
+    WEBHOOK_URL,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET,
+    WEBAPP_HOST,
+    WEBAPP_PORT,
+    DROP_PENDING_UPDATES
+)
+
+
+def build_webhook_app(dp, bot, secret_token=WEBHOOK_SECRET, path=WEBHOOK_PATH):
+    """
+    Create the aiohttp application that receives updates from Telegram.
+
+    Requests without the matching X-Telegram-Bot-Api-Secret-Token header are rejected.
+
+    Args:
+        dp: Dispatcher to feed updates into
+        bot: Bot instance
+        secret_token: Secret token configured for the webhook
+        path: URL path the webhook is served on
+
+    Returns:
+        web.Application: Configured application
+    """
+    app = web.Application()
+    # Dispatcher shutdown handlers first: the request handler's own shutdown hook closes the bot session
+    setup_application(app, dp, bot=bot)
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=secret_token).register(app, path=path)
+    return app
+
+
+async def run_webhook(dp, bot):
+    """Register the webhook with Telegram and serve updates until cancelled."""
+    if not WEBHOOK_URL or not WEBHOOK_SECRET:
+        raise RuntimeError("WEBHOOK_URL and WEBHOOK_SECRET must be set in webhook mode")
+
+    # Updates queued by Telegram while the bot was down are kept unless configured otherwise
+    await bot.set_webhook(
+        url=WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+        secret_token=WEBHOOK_SECRET,
+        allowed_updates=dp.resolve_used_update_types(),
+        drop_pending_updates=DROP_PENDING_UPDATES
+    )
+
+    app = build_webhook_app(dp, bot)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, WEBAPP_HOST, WEBAPP_PORT)
+    await site.start()
+    logging.info("Serving webhook on %s:%s%s", WEBAPP_HOST, WEBAPP_PORT, WEBHOOK_PATH)
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
@@ -10,6 +10,69 @@ ADMIN_IDS = list(map(int, os.getenv("ADMIN_IDS", "").split(","))) if os.getenv("
 
 # Channel settings
 CHANNEL_ID = os.getenv("CHANNEL_ID")
+# Comma-separated list of channels to publish the menu to, defaults to CHANNEL_ID
+CHANNEL_IDS = [channel.strip() for channel in os.getenv("CHANNEL_IDS", "").split(",") if channel.strip()] \
+    or ([CHANNEL_ID] if CHANNEL_ID else [])
+PUBLISH_CONCURRENCY = int(os.getenv("PUBLISH_CONCURRENCY", "5"))  # channels published at once
 
 # Database settings
-DB_PATH = os.path.join(os.path.dirname(__file__), "database", "menu_bot.db")
+DB_PATH = os.getenv("DB_PATH") or os.path.join(os.path.dirname(__file__), "database", "menu_bot.db")
+
+# SQLite connection tuning
+DB_CACHE_SIZE = int(os.getenv("DB_CACHE_SIZE", "-8000"))  # negative value = KiB
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(64 * 1024 * 1024)))
+DB_CACHED_STATEMENTS = int(os.getenv("DB_CACHED_STATEMENTS", "128"))
+
+# Bot API rate limiting
+RATE_LIMIT_GLOBAL = float(os.getenv("RATE_LIMIT_GLOBAL", "30"))  # requests per second
+RATE_LIMIT_CALLBACK_ANSWERS = float(os.getenv("RATE_LIMIT_CALLBACK_ANSWERS", "300"))  # per second, own bucket
+RATE_LIMIT_PRIVATE_PER_SECOND = float(os.getenv("RATE_LIMIT_PRIVATE_PER_SECOND", "1"))
+RATE_LIMIT_GROUP_PER_MINUTE = float(os.getenv("RATE_LIMIT_GROUP_PER_MINUTE", "20"))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "3"))
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "3"))
+RATE_LIMIT_MAX_RETRY_AFTER = int(os.getenv("RATE_LIMIT_MAX_RETRY_AFTER", "60"))  # seconds
+
+# Update delivery: "polling" or "webhook"
+BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+DROP_PENDING_UPDATES = os.getenv("DROP_PENDING_UPDATES", "false").lower() in ("1", "true", "yes")
+
+# Webhook settings (used when BOT_MODE=webhook)
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")  # public base URL, e.g. https://bot.example.com
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBAPP_HOST = os.getenv("WEBAPP_HOST", "0.0.0.0")
+WEBAPP_PORT = int(os.getenv("WEBAPP_PORT", "8080"))
+
+# Custom Bot API server, e.g. a local stand-in for testing
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "")
+
+# FSM storage
+FSM_CACHE_SIZE = int(os.getenv("FSM_CACHE_SIZE", "1024"))  # records kept in memory
+FSM_FLUSH_INTERVAL = float(os.getenv("FSM_FLUSH_INTERVAL", "1.0"))  # seconds between writes
+
+# Click analytics
+ANALYTICS_BATCH_SIZE = int(os.getenv("ANALYTICS_BATCH_SIZE", "100"))  # events per write
+ANALYTICS_FLUSH_INTERVAL_MS = int(os.getenv("ANALYTICS_FLUSH_INTERVAL_MS", "500"))
+ANALYTICS_QUEUE_SIZE = int(os.getenv("ANALYTICS_QUEUE_SIZE", "10000"))
+
+# Price link history retention
+PRICE_HISTORY_LIMIT = int(os.getenv("PRICE_HISTORY_LIMIT", "10"))  # versions kept per item
+PRICE_COMPACTION_INTERVAL = int(os.getenv("PRICE_COMPACTION_INTERVAL", "3600"))  # seconds
+
+# Items per page in admin panel lists (Telegram allows up to 100 buttons per keyboard)
+ADMIN_PAGE_SIZE = int(os.getenv("ADMIN_PAGE_SIZE", "20"))
+
+# Automatic republishing after menu changes
+AUTO_PUBLISH = os.getenv("AUTO_PUBLISH", "false").lower() in ("1", "true", "yes")
+AUTO_PUBLISH_DELAY = float(os.getenv("AUTO_PUBLISH_DELAY", "5"))  # seconds to coalesce changes
+
+# Prometheus metrics endpoint, served on METRICS_HOST:METRICS_PORT/metrics (0 disables)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))
+
+# On-demand profiling (/profile) and the slow update log (/slowlog)
+PROFILE_DIR = os.getenv("PROFILE_DIR") or os.path.join(os.path.dirname(__file__), "profiles")
+PROFILE_MAX_SECONDS = int(os.getenv("PROFILE_MAX_SECONDS", "300"))
+PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", "20"))  # functions listed in the summary
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "10"))  # newest .pstats files kept in PROFILE_DIR
+SLOWLOG_SIZE = int(os.getenv("SLOWLOG_SIZE", "1000"))  # recent updates kept for /slowlog
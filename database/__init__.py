@@ -1,3 +1,4 @@
-from .models import Database
+from .models import Database, MenuItemsPage
+from .cache import MenuCache, MenuSnapshot
 
-__all__ = ['Database']
+__all__ = ['Database', 'MenuItemsPage', 'MenuCache', 'MenuSnapshot']
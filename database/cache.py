@@ -0,0 +1,66 @@
+from dataclasses import dataclass
+from types import MappingProxyType
+
+
+@dataclass(frozen=True)
+class MenuSnapshot:
+    """Immutable view of the menu at a given cache version."""
+
+    version: int
+    items: tuple
+    by_id: MappingProxyType
+    answers: MappingProxyType
+
+
+class MenuCache:
+    """In-process cache holding the latest menu snapshot.
+
+    Writers call ``invalidate()`` to bump the version; a snapshot is served only
+    while its version matches the current one.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._snapshot = None
+
+    def get(self):
+        """Return the cached snapshot if it is current, otherwise None."""
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self.version:
+            self.hits += 1
+            return snapshot
+
+        self.misses += 1
+        return None
+
+    def store(self, version, rows, build_answer):
+        """
+        Build a snapshot from rows loaded at ``version`` and cache it if still current.
+
+        Args:
+            version: Cache version the rows were loaded at
+            rows: Menu item rows
+            build_answer: Callable getting the click answer text of an item
+        """
+        items = tuple(MappingProxyType(dict(row)) for row in rows)
+        snapshot = MenuSnapshot(
+            version=version,
+            items=items,
+            by_id=MappingProxyType({item['id']: item for item in items}),
+            answers=MappingProxyType({item['id']: build_answer(item) for item in items})
+        )
+
+        # Skip caching if a write happened while the rows were being loaded
+        if version == self.version:
+            self._snapshot = snapshot
+        return snapshot
+
+    def invalidate(self):
+        """Mark the cached snapshot as stale."""
+        self.version += 1
+
+    def stats(self):
+        """Get cache hit/miss counters."""
+        return {'version': self.version, 'hits': self.hits, 'misses': self.misses}
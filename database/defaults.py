@@ -0,0 +1,70 @@
+# Menu item types, in the order the default layout shows them
+ITEM_TYPES = ('price', 'info', 'contact')
+
+# Telegram limits callback alert texts to 200 characters
+MAX_ITEM_CONTENT_LENGTH = 200
+
+# Initial menu structure: (type, title, url, position, is_dynamic)
+DEFAULT_MENU_ITEMS = (
+    ('price', '📱 Прайс на НОВЫЕ iPhone 📱', None, 1, True),
+    ('price', '📱 Прайс на Б/У iPhone 📱', None, 2, True),
+    ('price', '🎧 Прайс на AirPods и Apple Watch ⌚', None, 3, True),
+    ('info', '✅ Гарантия', None, 4, False),
+    ('info', '🏠 Адрес / Как нас найти?', None, 5, False),
+    ('info', '💳 Рассрочка / Кредит от 1%', None, 6, False),
+    ('info', '🚚 Доставка', None, 7, False),
+    ('info', '💰 Оплата', None, 8, False),
+    ('info', '‼ Ответы на часто задаваемые вопросы', None, 9, False),
+    ('contact', '✍ Написать МЕНЕДЖЕРУ', '@appleempire56', 10, False),
+)
+
+# Default click answers for the initial info items, keyed by item title
+DEFAULT_ITEM_CONTENT = {
+    "✅ Гарантия": (
+        "🔹 На все новые устройства гарантия 1 год\n"
+        "🔹 На б/у устройства гарантия 1 месяц\n"
+        "🔹 Гарантия распространяется на заводские дефекты"
+    ),
+    "🏠 Адрес / Как нас найти?": (
+        "🏢 Наш адрес: г. Орск, пр. Ленина, 21\n"
+        "🕙 Режим работы: Пн-Пт с 10:00 до 19:00, Сб-Вс с 10:00 до 17:00\n"
+        "📍 Ориентир: ТЦ «Яблочный Спас», 2 этаж"
+    ),
+    "💳 Рассрочка / Кредит от 1%": (
+        "💳 Предлагаем рассрочку и кредит от 1%\n"
+        "📝 Для оформления необходим только паспорт\n"
+        "⏱ Решение принимается за 15 минут"
+    ),
+    "🚚 Доставка": (
+        "🚚 Доставка по городу - бесплатно\n"
+        "🌍 Доставка в другие города - по тарифам транспортных компаний\n"
+        "⏱ Срок доставки: 1-2 дня"
+    ),
+    "💰 Оплата": (
+        "💵 Наличными при получении\n"
+        "💳 Банковской картой\n"
+        "📱 Переводом на карту"
+    ),
+    "‼ Ответы на часто задаваемые вопросы": (
+        "❓ Можно ли проверить устройство перед покупкой?\n"
+        "✅ Да, полностью\n\n"
+        "❓ Есть ли рассрочка без переплаты?\n"
+        "✅ Да, 0% на 3 месяца\n\n"
+        "❓ Работаете ли вы с регионами?\n"
+        "✅ Да, отправляем по всей России"
+    )
+}
+
+# Click answers for items without their own content
+NO_INFO_ANSWER = "Информация будет добавлена позже"
+NO_PRICE_ANSWER = "Прайс-лист еще не добавлен"
+NOT_FOUND_ANSWER = "Информация не найдена"
+
+
+def build_click_answer(item):
+    """Get the alert text shown when a menu item button is clicked."""
+    if item.get('content'):
+        return item['content']
+    if item['type'] == 'price' and item['is_dynamic']:
+        return NO_PRICE_ANSWER
+    return NO_INFO_ANSWER
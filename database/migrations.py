@@ -0,0 +1,233 @@
+import logging
+from typing import NamedTuple
+
+from .defaults import DEFAULT_ITEM_CONTENT
+
+
+class Migration(NamedTuple):
+    """A schema change applied once, in order, when ``PRAGMA user_version`` is below ``version``."""
+
+    version: int
+    description: str
+    steps: tuple
+    analyze: bool = False  # refresh planner statistics after applying (index changes)
+
+
+async def _add_menu_config_content_hash(db):
+    # Databases set up before versioned migrations may already have the column
+    async with db.execute('PRAGMA table_info(menu_config)') as cursor:
+        columns = {row[1] for row in await cursor.fetchall()}
+    if 'content_hash' not in columns:
+        await db.execute('ALTER TABLE menu_config ADD COLUMN content_hash TEXT')
+
+
+# Seeded FAQ answer longer than a callback alert can show
+_OLD_FAQ_TITLE = "‼ Ответы на часто задаваемые вопросы"
+_OLD_FAQ_CONTENT = (
+    "❓ <b>Можно ли проверить устройство перед покупкой?</b>\n"
+    "✅ Да, мы предоставляем возможность полной проверки\n\n"
+    "❓ <b>Есть ли у вас рассрочка без переплаты?</b>\n"
+    "✅ Да, предлагаем рассрочку 0% на 3 месяца\n\n"
+    "❓ <b>Работаете ли вы с регионами?</b>\n"
+    "✅ Да, отправляем товары по всей России"
+)
+
+
+async def _shorten_default_faq(db):
+    # Only the untouched seeded text; answers edited by admins are left alone
+    await db.execute(
+        'UPDATE item_content SET content = ? WHERE content = ?',
+        (DEFAULT_ITEM_CONTENT[_OLD_FAQ_TITLE], _OLD_FAQ_CONTENT)
+    )
+
+
+# Every step must also be safe on databases created by the old CREATE TABLE IF NOT EXISTS
+# bootstrap, which report user_version 0 but may already contain some of these objects.
+MIGRATIONS = (
+    Migration(1, "initial schema", (
+        '''
+        CREATE TABLE IF NOT EXISTS menu_config (
+            id INTEGER PRIMARY KEY,
+            menu_message_id INTEGER,
+            channel_id TEXT,
+            is_pinned BOOLEAN DEFAULT 1
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS menu_items (
+            id INTEGER PRIMARY KEY,
+            type TEXT NOT NULL,
+            title TEXT NOT NULL,
+            url TEXT,
+            position INTEGER NOT NULL,
+            is_dynamic BOOLEAN DEFAULT 0
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS price_posts (
+            id INTEGER PRIMARY KEY,
+            item_id INTEGER,
+            post_url TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (item_id) REFERENCES menu_items (id) ON DELETE CASCADE
+        )
+        ''',
+    )),
+    Migration(2, "menu content hash", (
+        _add_menu_config_content_hash,
+    )),
+    Migration(3, "persistent FSM storage", (
+        '''
+        CREATE TABLE IF NOT EXISTS fsm_storage (
+            key TEXT PRIMARY KEY,
+            state TEXT,
+            data TEXT NOT NULL DEFAULT '{}'
+        )
+        ''',
+    )),
+    Migration(4, "item click answers", (
+        '''
+        CREATE TABLE IF NOT EXISTS item_content (
+            item_id INTEGER PRIMARY KEY,
+            content TEXT NOT NULL,
+            FOREIGN KEY (item_id) REFERENCES menu_items (id) ON DELETE CASCADE
+        )
+        ''',
+    )),
+    Migration(5, "analytics events and rollups", (
+        '''
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY,
+            event_type TEXT NOT NULL,
+            item_id INTEGER,
+            user_id INTEGER,
+            created_at INTEGER NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS event_rollups_daily (
+            day TEXT NOT NULL,
+            event_type TEXT NOT NULL,
+            item_id INTEGER NOT NULL DEFAULT 0,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (day, event_type, item_id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS event_rollups_hourly (
+            hour TEXT NOT NULL,
+            event_type TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (hour, event_type)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS rollup_state (
+            name TEXT PRIMARY KEY,
+            last_event_id INTEGER NOT NULL
+        )
+        ''',
+    )),
+    Migration(6, "price_posts lookup index", (
+        '''
+        CREATE INDEX IF NOT EXISTS idx_price_posts_item_updated
+        ON price_posts (item_id, updated_at, id)
+        ''',
+    ), analyze=True),
+    Migration(7, "menu config per channel", (
+        '''
+        CREATE TABLE menu_config_channels (
+            channel_id TEXT PRIMARY KEY,
+            menu_message_id INTEGER,
+            is_pinned BOOLEAN DEFAULT 1,
+            content_hash TEXT
+        )
+        ''',
+        '''
+        INSERT OR IGNORE INTO menu_config_channels (channel_id, menu_message_id, is_pinned, content_hash)
+        SELECT channel_id, menu_message_id, is_pinned, content_hash
+        FROM menu_config
+        WHERE channel_id IS NOT NULL
+        ''',
+        'DROP TABLE menu_config',
+        'ALTER TABLE menu_config_channels RENAME TO menu_config',
+    )),
+    Migration(8, "admin roster", (
+        '''
+        CREATE TABLE IF NOT EXISTS admins (
+            user_id INTEGER PRIMARY KEY,
+            added_by INTEGER,
+            added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    )),
+    Migration(9, "menu layouts per channel", (
+        '''
+        CREATE TABLE IF NOT EXISTS menu_layouts (
+            channel_id TEXT PRIMARY KEY,
+            spec TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    )),
+    Migration(10, "menu_items pagination index", (
+        '''
+        CREATE INDEX IF NOT EXISTS idx_menu_items_type_position
+        ON menu_items (type, position)
+        ''',
+    ), analyze=True),
+    Migration(11, "default FAQ answer within the alert limit", (
+        _shorten_default_faq,
+    )),
+)
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+async def get_schema_version(db):
+    """Get the schema version recorded in the database file."""
+    async with db.execute('PRAGMA user_version') as cursor:
+        return (await cursor.fetchone())[0]
+
+
+async def apply_migrations(db, migrations=MIGRATIONS):
+    """
+    Apply pending migrations to an open connection in a single transaction.
+
+    Does nothing beyond reading ``PRAGMA user_version`` when the schema is current.
+
+    Args:
+        db: aiosqlite connection
+        migrations: Ordered migrations to apply
+
+    Returns:
+        int: Schema version after migrating
+    """
+    current = await get_schema_version(db)
+    pending = [migration for migration in migrations if migration.version > current]
+
+    if not pending:
+        return current
+
+    await db.execute('BEGIN')
+    try:
+        for migration in pending:
+            logging.info("Applying migration %s: %s", migration.version, migration.description)
+            for step in migration.steps:
+                if callable(step):
+                    await step(db)
+                else:
+                    await db.execute(step)
+        await db.execute(f'PRAGMA user_version = {pending[-1].version}')
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+
+    # Give the query planner fresh statistics for new or changed indexes
+    if any(migration.analyze for migration in pending):
+        await db.execute('ANALYZE')
+        await db.execute('PRAGMA optimize')
+        await db.commit()
+
+    return pending[-1].version
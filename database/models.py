@@ -1,168 +1,622 @@
+import asyncio
 import aiosqlite
+import functools
 import os
-from config import DB_PATH
+import time
+from contextlib import asynccontextmanager
+from typing import NamedTuple
+from config import ADMIN_PAGE_SIZE, DB_PATH, DB_CACHE_SIZE, DB_MMAP_SIZE, DB_CACHED_STATEMENTS, PRICE_HISTORY_LIMIT
+from .cache import MenuCache
+from .defaults import DEFAULT_ITEM_CONTENT, DEFAULT_MENU_ITEMS, build_click_answer
+from .migrations import apply_migrations
+
+
+def timed(method):
+    """Report the duration of a Database method to every registered query observer."""
+    name = method.__name__
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        if not self._query_observers:
+            return await method(self, *args, **kwargs)
+
+        started = time.perf_counter()
+        failed = False
+        try:
+            return await method(self, *args, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            for observer in self._query_observers:
+                observer(name, elapsed, failed)
+
+    return wrapper
+
+
+class MenuItemsPage(NamedTuple):
+    """One page of menu items from Database.get_menu_items_page()."""
+
+    items: list
+    has_prev: bool
+    has_next: bool
+
 
 class Database:
     """Database class for managing SQLite operations."""
-    
+
+    # Shared connections, write locks and menu caches, one per database file
+    _connections = {}
+    _write_locks = {}
+    _menu_caches = {}
+
+    # Callables receiving (method name, seconds, failed) after every query method
+    _query_observers = []
+
     def __init__(self, db_path=DB_PATH):
         self.db_path = db_path
-        
-    async def create_tables(self):
-        """Create necessary tables if they don't exist."""
+
+    @property
+    def cache(self):
+        """Menu snapshot cache shared by every instance for this database file."""
+        cache = self._menu_caches.get(self.db_path)
+        if cache is None:
+            cache = self._menu_caches[self.db_path] = MenuCache()
+        return cache
+
+    async def connect(self):
+        """Open the shared connection for this database file if it isn't open yet."""
+        db = self._connections.get(self.db_path)
+        if db is not None:
+            return db
+
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        
-        async with aiosqlite.connect(self.db_path) as db:
-            # Create menu_config table
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS menu_config (
-                    id INTEGER PRIMARY KEY,
-                    menu_message_id INTEGER,
-                    channel_id TEXT,
-                    is_pinned BOOLEAN DEFAULT 1
-                )
-            ''')
-            
-            # Create menu_items table
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS menu_items (
-                    id INTEGER PRIMARY KEY,
-                    type TEXT NOT NULL,
-                    title TEXT NOT NULL,
-                    url TEXT,
-                    position INTEGER NOT NULL,
-                    is_dynamic BOOLEAN DEFAULT 0
-                )
-            ''')
-            
-            # Create price_posts table for dynamic content
+
+        db = await aiosqlite.connect(self.db_path, cached_statements=DB_CACHED_STATEMENTS)
+        db.row_factory = aiosqlite.Row
+        await db.execute('PRAGMA journal_mode = WAL')
+        await db.execute('PRAGMA synchronous = NORMAL')
+        await db.execute(f'PRAGMA cache_size = {DB_CACHE_SIZE}')
+        await db.execute(f'PRAGMA mmap_size = {DB_MMAP_SIZE}')
+        await db.execute('PRAGMA temp_store = MEMORY')
+
+        # Another coroutine may have connected while we were awaiting
+        if self.db_path in self._connections:
+            await db.close()
+            return self._connections[self.db_path]
+
+        self._connections[self.db_path] = db
+        self._write_locks[self.db_path] = asyncio.Lock()
+        return db
+
+    async def close(self):
+        """Close the shared connection for this database file."""
+        db = self._connections.pop(self.db_path, None)
+        self._write_locks.pop(self.db_path, None)
+        if db is not None:
+            await db.close()
+
+    @classmethod
+    def add_query_observer(cls, observer):
+        """Register a callable receiving (method name, seconds, failed) after every query method."""
+        if observer not in cls._query_observers:
+            cls._query_observers.append(observer)
+
+    @asynccontextmanager
+    async def _transaction(self, menu=False):
+        """
+        Serialize writers on the shared connection and commit or roll back as a unit.
+
+        Reads on the shared connection see uncommitted rows, so a transaction
+        touching the menu (``menu=True``) invalidates the snapshot cache once it
+        has committed or rolled back, dropping any snapshot built in between.
+        """
+        db = await self.connect()
+        async with self._write_locks[self.db_path]:
+            try:
+                yield db
+            except BaseException:
+                await db.rollback()
+                raise
+            else:
+                await db.commit()
+            finally:
+                if menu:
+                    self.cache.invalidate()
+
+    @timed
+    async def create_tables(self):
+        """Bring the schema up to date by applying pending migrations."""
+        db = await self.connect()
+        async with self._write_locks[self.db_path]:
+            return await apply_migrations(db)
+
+    @timed
+    async def get_menu_config(self, channel_id):
+        """Get menu configuration for a channel."""
+        db = await self.connect()
+        async with db.execute('SELECT * FROM menu_config WHERE channel_id = ?', (str(channel_id),)) as cursor:
+            return await cursor.fetchone()
+
+    @timed
+    async def get_menu_configs(self):
+        """Get menu configuration for every channel the menu was published to."""
+        db = await self.connect()
+        async with db.execute('SELECT * FROM menu_config ORDER BY channel_id') as cursor:
+            return await cursor.fetchall()
+
+    @timed
+    async def update_menu_config(self, message_id, channel_id, is_pinned=True, content_hash=None):
+        """Update menu configuration for a channel."""
+        async with self._transaction() as db:
             await db.execute('''
-                CREATE TABLE IF NOT EXISTS price_posts (
-                    id INTEGER PRIMARY KEY,
-                    item_id INTEGER,
-                    post_url TEXT NOT NULL,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (item_id) REFERENCES menu_items (id) ON DELETE CASCADE
-                )
-            ''')
-            
-            await db.commit()
-    
-    async def get_menu_config(self):
-        """Get current menu configuration."""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute('SELECT * FROM menu_config LIMIT 1') as cursor:
-                return await cursor.fetchone()
-    
-    async def update_menu_config(self, message_id, channel_id, is_pinned=True):
-        """Update menu configuration."""
-        async with aiosqlite.connect(self.db_path) as db:
+                INSERT OR REPLACE INTO menu_config (channel_id, menu_message_id, is_pinned, content_hash)
+                VALUES (?, ?, ?, ?)
+            ''', (str(channel_id), message_id, is_pinned, content_hash))
+
+    @timed
+    async def get_menu_layout(self, channel_id):
+        """Get the stored keyboard layout spec of a channel, or None if it uses the default."""
+        db = await self.connect()
+        async with db.execute('SELECT spec FROM menu_layouts WHERE channel_id = ?', (str(channel_id),)) as cursor:
+            row = await cursor.fetchone()
+            return row['spec'] if row else None
+
+    @timed
+    async def get_menu_layouts(self):
+        """Get the keyboard layout specs of every channel that has its own."""
+        db = await self.connect()
+        async with db.execute('SELECT channel_id, spec, updated_at FROM menu_layouts ORDER BY channel_id') as cursor:
+            return await cursor.fetchall()
+
+    @timed
+    async def set_menu_layout(self, channel_id, spec):
+        """Store the keyboard layout spec (canonical JSON) of a channel."""
+        async with self._transaction() as db:
             await db.execute('''
-                INSERT OR REPLACE INTO menu_config (id, menu_message_id, channel_id, is_pinned)
-                VALUES (1, ?, ?, ?)
-            ''', (message_id, channel_id, is_pinned))
-            await db.commit()
-    
+                INSERT OR REPLACE INTO menu_layouts (channel_id, spec, updated_at)
+                VALUES (?, ?, CURRENT_TIMESTAMP)
+            ''', (str(channel_id), spec))
+
+    @timed
+    async def delete_menu_layout(self, channel_id):
+        """Return a channel to the default layout; returns False if it had none of its own."""
+        async with self._transaction() as db:
+            cursor = await db.execute('DELETE FROM menu_layouts WHERE channel_id = ?', (str(channel_id),))
+            return cursor.rowcount > 0
+
+    @timed
     async def get_menu_items(self, dynamic_only=False):
         """Get all menu items, optionally filtered by dynamic status."""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            query = 'SELECT * FROM menu_items'
-            if dynamic_only:
-                query += ' WHERE is_dynamic = 1'
-            query += ' ORDER BY position'
-            
-            async with db.execute(query) as cursor:
-                return await cursor.fetchall()
-    
+        db = await self.connect()
+        query = 'SELECT * FROM menu_items'
+        if dynamic_only:
+            query += ' WHERE is_dynamic = 1'
+        query += ' ORDER BY position'
+
+        async with db.execute(query) as cursor:
+            return await cursor.fetchall()
+
+    @timed
+    async def get_menu_items_page(self, item_type, cursor=None, backward=False, limit=ADMIN_PAGE_SIZE):
+        """Get a page of menu items of one type in position order, by keyset pagination.
+
+        Pages are seeked through the (type, position) index, so any page costs
+        the same however far into the list it is. Items are ordered by
+        (position, id), which stays unambiguous when positions repeat.
+
+        Args:
+            item_type: Menu item type to list
+            cursor: (position, id) of the item the page starts after, or ends
+                before when ``backward``; None for the first page
+            backward: Get the page preceding the cursor
+            limit: Maximum number of items on the page
+
+        Returns:
+            MenuItemsPage: Items in position order and whether there are pages around them
+        """
+        db = await self.connect()
+        if cursor is None:
+            query = 'SELECT * FROM menu_items WHERE type = ? ORDER BY position, id LIMIT ?'
+            params = (item_type, limit + 1)
+        elif backward:
+            query = '''
+                SELECT * FROM menu_items WHERE type = ? AND (position, id) < (?, ?)
+                ORDER BY position DESC, id DESC LIMIT ?
+            '''
+            params = (item_type, *cursor, limit + 1)
+        else:
+            query = '''
+                SELECT * FROM menu_items WHERE type = ? AND (position, id) > (?, ?)
+                ORDER BY position, id LIMIT ?
+            '''
+            params = (item_type, *cursor, limit + 1)
+
+        async with db.execute(query, params) as db_cursor:
+            rows = await db_cursor.fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if backward:
+            rows.reverse()
+            return MenuItemsPage(rows, has_more, cursor is not None)
+        return MenuItemsPage(rows, cursor is not None, has_more)
+
+    @timed
+    async def get_menu_items_page_at(self, item_id, limit=ADMIN_PAGE_SIZE):
+        """Get the page of menu items that starts at a given item, among items of its type.
+
+        Args:
+            item_id: ID of the first item on the page
+            limit: Maximum number of items on the page
+
+        Returns:
+            MenuItemsPage: Items in position order, empty if the item doesn't exist
+        """
+        db = await self.connect()
+        async with db.execute('''
+            SELECT page.* FROM menu_items AS item
+            JOIN menu_items AS page
+                ON page.type = item.type AND (page.position, page.id) >= (item.position, item.id)
+            WHERE item.id = ?
+            ORDER BY page.position, page.id LIMIT ?
+        ''', (item_id, limit + 1)) as cursor:
+            rows = await cursor.fetchall()
+
+        if not rows:
+            return MenuItemsPage([], False, False)
+
+        first = rows[0]
+        async with db.execute('''
+            SELECT EXISTS (SELECT 1 FROM menu_items WHERE type = ? AND (position, id) < (?, ?))
+        ''', (first['type'], first['position'], first['id'])) as cursor:
+            has_prev = bool((await cursor.fetchone())[0])
+
+        return MenuItemsPage(rows[:limit], has_prev, len(rows) > limit)
+
+    @timed
+    async def get_menu_snapshot(self):
+        """Get the cached menu snapshot, loading it from the database on a miss."""
+        snapshot = self.cache.get()
+        if snapshot is None:
+            version = self.cache.version
+            snapshot = self.cache.store(version, await self._load_menu_snapshot(), build_click_answer)
+        return snapshot
+
+    @timed
+    async def _load_menu_snapshot(self):
+        """Get all menu items with the latest price post URL resolved in a single query.
+
+        Dynamic items get their ``url`` replaced by the latest price post (if any);
+        the raw latest post URL is also exposed as ``price_url``.
+        """
+        db = await self.connect()
+        async with db.execute('''
+            SELECT
+                m.id, m.type, m.title, m.position, m.is_dynamic,
+                CASE WHEN m.is_dynamic AND p.item_id IS NOT NULL THEN p.post_url ELSE m.url END AS url,
+                p.post_url AS price_url,
+                c.content
+            FROM menu_items m
+            LEFT JOIN item_content c ON c.item_id = m.id
+            LEFT JOIN (
+                SELECT item_id, post_url,
+                       ROW_NUMBER() OVER (PARTITION BY item_id ORDER BY updated_at DESC, id DESC) AS rn
+                FROM price_posts
+            ) p ON p.item_id = m.id AND p.rn = 1
+            ORDER BY m.position
+        ''') as cursor:
+            return await cursor.fetchall()
+
+    @timed
+    async def get_item_content(self, item_id):
+        """Get the click answer text of a menu item."""
+        db = await self.connect()
+        async with db.execute('SELECT content FROM item_content WHERE item_id = ?', (item_id,)) as cursor:
+            row = await cursor.fetchone()
+            return row['content'] if row else None
+
+    @timed
+    async def set_item_content(self, item_id, content):
+        """Set or clear (with an empty value) the click answer text of a menu item."""
+        async with self._transaction(menu=True) as db:
+            if content:
+                await db.execute('''
+                    INSERT INTO item_content (item_id, content) VALUES (?, ?)
+                    ON CONFLICT (item_id) DO UPDATE SET content = excluded.content
+                ''', (item_id, content))
+            else:
+                await db.execute('DELETE FROM item_content WHERE item_id = ?', (item_id,))
+
+    @timed
     async def get_menu_item(self, item_id):
         """Get a specific menu item by ID."""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute('SELECT * FROM menu_items WHERE id = ?', (item_id,)) as cursor:
-                return await cursor.fetchone()
-    
+        db = await self.connect()
+        async with db.execute('SELECT * FROM menu_items WHERE id = ?', (item_id,)) as cursor:
+            return await cursor.fetchone()
+
+    @timed
     async def add_menu_item(self, type, title, url=None, position=0, is_dynamic=False):
         """Add a new menu item."""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._transaction(menu=True) as db:
             cursor = await db.execute('''
                 INSERT INTO menu_items (type, title, url, position, is_dynamic)
                 VALUES (?, ?, ?, ?, ?)
             ''', (type, title, url, position, is_dynamic))
-            await db.commit()
-            return cursor.lastrowid
-    
+        return cursor.lastrowid
+
+    @timed
     async def update_menu_item(self, item_id, **kwargs):
         """Update an existing menu item."""
         allowed_fields = {'type', 'title', 'url', 'position', 'is_dynamic'}
         fields = [f"{k} = ?" for k in kwargs.keys() if k in allowed_fields]
         values = [v for k, v in kwargs.items() if k in allowed_fields]
-        
+
         if not fields:
             return False
-        
-        async with aiosqlite.connect(self.db_path) as db:
+
+        async with self._transaction(menu=True) as db:
             await db.execute(
                 f"UPDATE menu_items SET {', '.join(fields)} WHERE id = ?",
                 (*values, item_id)
             )
-            await db.commit()
-            return True
-    
+        return True
+
+    @timed
     async def delete_menu_item(self, item_id):
         """Delete a menu item."""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._transaction(menu=True) as db:
             await db.execute('DELETE FROM menu_items WHERE id = ?', (item_id,))
-            await db.commit()
-    
+
+    @timed
     async def get_price_post(self, item_id):
         """Get the latest price post for a menu item."""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute(
-                'SELECT * FROM price_posts WHERE item_id = ? ORDER BY updated_at DESC LIMIT 1',
-                (item_id,)
-            ) as cursor:
-                return await cursor.fetchone()
-    
+        db = await self.connect()
+        async with db.execute(
+            'SELECT * FROM price_posts WHERE item_id = ? ORDER BY updated_at DESC, id DESC LIMIT 1',
+            (item_id,)
+        ) as cursor:
+            return await cursor.fetchone()
+
+    @timed
     async def update_price_post(self, item_id, post_url):
         """Update or create a price post for a menu item."""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._transaction(menu=True) as db:
             await db.execute('''
                 INSERT INTO price_posts (item_id, post_url)
                 VALUES (?, ?)
             ''', (item_id, post_url))
-            await db.commit()
-    
+
+    @timed
+    async def get_price_history(self, item_id, limit=PRICE_HISTORY_LIMIT):
+        """Get the most recent price posts for a menu item, newest first."""
+        db = await self.connect()
+        async with db.execute('''
+            SELECT post_url, updated_at FROM price_posts
+            WHERE item_id = ?
+            ORDER BY updated_at DESC, id DESC
+            LIMIT ?
+        ''', (item_id, limit)) as cursor:
+            return await cursor.fetchall()
+
+    @timed
+    async def compact_price_posts(self, keep=PRICE_HISTORY_LIMIT):
+        """Delete all but the ``keep`` most recent price posts of every item."""
+        keep = max(keep, 1)  # the latest post is the live price link
+        async with self._transaction() as db:
+            cursor = await db.execute('''
+                DELETE FROM price_posts WHERE id IN (
+                    SELECT id FROM (
+                        SELECT id, ROW_NUMBER() OVER (
+                            PARTITION BY item_id ORDER BY updated_at DESC, id DESC
+                        ) AS rn
+                        FROM price_posts
+                    ) WHERE rn > ?
+                )
+            ''', (keep,))
+            return cursor.rowcount
+
+    @timed
+    async def export_menu(self):
+        """Get menu items, click answers and the full price post history for export."""
+        db = await self.connect()
+        async with db.execute('SELECT * FROM menu_items ORDER BY position, id') as cursor:
+            items = await cursor.fetchall()
+        async with db.execute('SELECT item_id, content FROM item_content') as cursor:
+            contents = await cursor.fetchall()
+        async with db.execute(
+            'SELECT item_id, post_url, updated_at FROM price_posts ORDER BY item_id, updated_at, id'
+        ) as cursor:
+            price_posts = await cursor.fetchall()
+        return items, contents, price_posts
+
+    @timed
+    async def replace_menu(self, items, contents, price_posts):
+        """
+        Replace the whole menu in a single transaction.
+
+        Args:
+            items: (id, type, title, url, position, is_dynamic) tuples
+            contents: (item_id, content) tuples
+            price_posts: (item_id, post_url, updated_at) tuples, updated_at may be None
+        """
+        async with self._transaction(menu=True) as db:
+            await db.execute('DELETE FROM price_posts')
+            await db.execute('DELETE FROM item_content')
+            await db.execute('DELETE FROM menu_items')
+            await db.executemany('''
+                INSERT INTO menu_items (id, type, title, url, position, is_dynamic)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', items)
+            await db.executemany('''
+                INSERT INTO item_content (item_id, content) VALUES (?, ?)
+            ''', contents)
+            await db.executemany('''
+                INSERT INTO price_posts (item_id, post_url, updated_at)
+                VALUES (?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+            ''', price_posts)
+
+    @timed
     async def initialize_default_menu(self):
-        """Initialize the default menu structure if no items exist."""
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute('SELECT COUNT(*) FROM menu_items')
-            count = await cursor.fetchone()
-            
+        """Seed the default menu, price posts and answers where missing, all in one transaction."""
+        async with self._transaction(menu=True) as db:
+            async with db.execute('SELECT COUNT(*) FROM menu_items') as cursor:
+                count = await cursor.fetchone()
+
             if count[0] == 0:
-                # Add dynamic price items
-                new_iphone_id = await self.add_menu_item(
-                    'price', '📱 Прайс на НОВЫЕ iPhone 📱', None, 1, True
-                )
-                used_iphone_id = await self.add_menu_item(
-                    'price', '📱 Прайс на Б/У iPhone 📱', None, 2, True
-                )
-                airpods_watch_id = await self.add_menu_item(
-                    'price', '🎧 Прайс на AirPods и Apple Watch ⌚', None, 3, True
-                )
-                
-                # Add static info items
-                await self.add_menu_item('info', '✅ Гарантия', None, 4, False)
-                await self.add_menu_item('info', '🏠 Адрес / Как нас найти?', None, 5, False)
-                await self.add_menu_item('info', '💳 Рассрочка / Кредит от 1%', None, 6, False)
-                await self.add_menu_item('info', '🚚 Доставка', None, 7, False)
-                await self.add_menu_item('info', '💰 Оплата', None, 8, False)
-                await self.add_menu_item('info', '‼ Ответы на часто задаваемые вопросы', None, 9, False)
-                await self.add_menu_item('contact', '✍ Написать МЕНЕДЖЕРУ', '@appleempire56', 10, False)
-                
-                # Initialize empty price posts for dynamic items
-                await self.update_price_post(new_iphone_id, '')
-                await self.update_price_post(used_iphone_id, '')
-                await self.update_price_post(airpods_watch_id, '')
+                await db.executemany('''
+                    INSERT INTO menu_items (type, title, url, position, is_dynamic)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', DEFAULT_MENU_ITEMS)
+
+                # Empty price posts for the dynamic items, filled in from the admin panel
+                await db.execute('''
+                    INSERT INTO price_posts (item_id, post_url)
+                    SELECT id, '' FROM menu_items WHERE is_dynamic = 1 ORDER BY position
+                ''')
+
+            await self._seed_item_content(db)
+
+    @timed
+    async def seed_item_content(self):
+        """Fill item_content with the default answers, matched by title, if it is empty."""
+        async with self._transaction(menu=True) as db:
+            await self._seed_item_content(db)
+
+    async def _seed_item_content(self, db):
+        async with db.execute('SELECT COUNT(*) FROM item_content') as cursor:
+            count = await cursor.fetchone()
+
+        if count[0] == 0:
+            await db.executemany('''
+                INSERT OR IGNORE INTO item_content (item_id, content)
+                SELECT id, ? FROM menu_items WHERE title = ?
+            ''', [(content, title) for title, content in DEFAULT_ITEM_CONTENT.items()])
+
+    @timed
+    async def get_admins(self):
+        """Get admins granted through the bot, oldest first."""
+        db = await self.connect()
+        async with db.execute('SELECT user_id, added_by, added_at FROM admins ORDER BY added_at, user_id') as cursor:
+            return await cursor.fetchall()
+
+    @timed
+    async def add_admin(self, user_id, added_by=None):
+        """Grant admin rights; returns False if the user already had them."""
+        async with self._transaction() as db:
+            cursor = await db.execute(
+                'INSERT OR IGNORE INTO admins (user_id, added_by) VALUES (?, ?)', (user_id, added_by)
+            )
+            return cursor.rowcount > 0
+
+    @timed
+    async def remove_admin(self, user_id):
+        """Revoke admin rights; returns False if the user was not an admin."""
+        async with self._transaction() as db:
+            cursor = await db.execute('DELETE FROM admins WHERE user_id = ?', (user_id,))
+            return cursor.rowcount > 0
+
+    @timed
+    async def get_fsm_record(self, key):
+        """Get the stored FSM state and data for a storage key."""
+        db = await self.connect()
+        async with db.execute('SELECT state, data FROM fsm_storage WHERE key = ?', (key,)) as cursor:
+            return await cursor.fetchone()
+
+    @timed
+    async def save_fsm_records(self, records):
+        """Write a batch of (key, state, data) FSM records, removing empty ones."""
+        upserts = [(key, state, data) for key, state, data in records if state is not None or data != '{}']
+        deletes = [(key,) for key, state, data in records if state is None and data == '{}']
+
+        async with self._transaction() as db:
+            if upserts:
+                await db.executemany('''
+                    INSERT INTO fsm_storage (key, state, data) VALUES (?, ?, ?)
+                    ON CONFLICT (key) DO UPDATE SET state = excluded.state, data = excluded.data
+                ''', upserts)
+            if deletes:
+                await db.executemany('DELETE FROM fsm_storage WHERE key = ?', deletes)
+
+    @timed
+    async def insert_events(self, events):
+        """Write a batch of (event_type, item_id, user_id, created_at) analytics events."""
+        async with self._transaction() as db:
+            await db.executemany('''
+                INSERT INTO events (event_type, item_id, user_id, created_at)
+                VALUES (?, ?, ?, ?)
+            ''', events)
+
+    @timed
+    async def refresh_rollups(self):
+        """Fold events recorded since the last refresh into the rollup tables."""
+        async with self._transaction() as db:
+            async with db.execute("SELECT last_event_id FROM rollup_state WHERE name = 'events'") as cursor:
+                row = await cursor.fetchone()
+            last_id = row['last_event_id'] if row else 0
+
+            async with db.execute('SELECT MAX(id) FROM events') as cursor:
+                max_id = (await cursor.fetchone())[0]
+            if max_id is None or max_id <= last_id:
+                return 0
+
+            await db.execute('''
+                INSERT INTO event_rollups_daily (day, event_type, item_id, count)
+                SELECT date(created_at, 'unixepoch', 'localtime'), event_type, COALESCE(item_id, 0), COUNT(*)
+                FROM events WHERE id > ? AND id <= ?
+                GROUP BY 1, 2, 3
+                ON CONFLICT (day, event_type, item_id) DO UPDATE SET count = count + excluded.count
+            ''', (last_id, max_id))
+            await db.execute('''
+                INSERT INTO event_rollups_hourly (hour, event_type, count)
+                SELECT strftime('%Y-%m-%d %H', created_at, 'unixepoch', 'localtime'), event_type, COUNT(*)
+                FROM events WHERE id > ? AND id <= ?
+                GROUP BY 1, 2
+                ON CONFLICT (hour, event_type) DO UPDATE SET count = count + excluded.count
+            ''', (last_id, max_id))
+            await db.execute('''
+                INSERT INTO rollup_state (name, last_event_id) VALUES ('events', ?)
+                ON CONFLICT (name) DO UPDATE SET last_event_id = excluded.last_event_id
+            ''', (max_id,))
+            return max_id - last_id
+
+    @timed
+    async def get_click_counts(self, days=None):
+        """Get the number of clicks per menu item, optionally for the last ``days`` days only."""
+        db = await self.connect()
+        query = "SELECT item_id, SUM(count) AS clicks FROM event_rollups_daily WHERE event_type = 'click'"
+        params = ()
+        if days:
+            query += " AND day >= date('now', 'localtime', ?)"
+            params = (f'-{days - 1} days',)
+        query += ' GROUP BY item_id'
+
+        async with db.execute(query, params) as cursor:
+            return {row['item_id']: row['clicks'] for row in await cursor.fetchall()}
+
+    @timed
+    async def get_event_totals(self, days):
+        """Get the number of events per type for the last ``days`` days."""
+        db = await self.connect()
+        async with db.execute('''
+            SELECT event_type, SUM(count) AS total FROM event_rollups_daily
+            WHERE day >= date('now', 'localtime', ?)
+            GROUP BY event_type
+        ''', (f'-{days - 1} days',)) as cursor:
+            return {row['event_type']: row['total'] for row in await cursor.fetchall()}
+
+    @timed
+    async def get_hourly_histogram(self, days, event_type='click'):
+        """Get event counts by hour of day (a list of 24 values) for the last ``days`` days."""
+        db = await self.connect()
+        histogram = [0] * 24
+        async with db.execute('''
+            SELECT CAST(substr(hour, 12, 2) AS INTEGER) AS hour_of_day, SUM(count) AS total
+            FROM event_rollups_hourly
+            WHERE event_type = ? AND hour >= strftime('%Y-%m-%d 00', 'now', 'localtime', ?)
+            GROUP BY hour_of_day
+        ''', (event_type, f'-{days - 1} days')) as cursor:
+            for row in await cursor.fetchall():
+                histogram[row['hour_of_day']] = row['total']
+        return histogram
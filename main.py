@@ -1,13 +1,27 @@
+import time
+
+# Taken before the other imports so the startup timeline includes them
+STARTED = time.perf_counter()
+
 import asyncio
 import logging
 import sys
 from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
-from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 
-from config import BOT_TOKEN
+from config import BOT_TOKEN, BOT_MODE, DROP_PENDING_UPDATES, TELEGRAM_API_URL
 from bot import admin_router, user_router, setup_database
+from bot.utils.analytics import analytics
+from bot.utils.autopublish import auto_publisher
+from bot.utils.fsm_storage import SQLiteStorage
+from bot.utils.maintenance import run_price_compaction
+from bot.utils.metrics import setup_metrics, start_metrics_server
+from bot.utils.rate_limit import RateLimitMiddleware
+from bot.utils.startup import FirstPollMiddleware, StartupTimeline
+from bot.utils.webhook import run_webhook
 
 # Configure logging
 logging.basicConfig(
@@ -20,27 +34,63 @@ logging.basicConfig(
 
 # Initialize bot and dispatcher
 async def main():
+    timeline = StartupTimeline(STARTED)
+    timeline.mark("imports")
+    
     # Check if token is provided
     if not BOT_TOKEN:
         logging.error("No token provided. Please set BOT_TOKEN in .env file")
         return
     
     # Initialize bot and dispatcher
-    bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-    dp = Dispatcher(storage=MemoryStorage())
+    session = AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL)) if TELEGRAM_API_URL else None
+    bot = Bot(token=BOT_TOKEN, session=session, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
     
-    # Register routers
-    dp.include_router(admin_router)
+    # Keep outgoing Bot API calls within Telegram's flood limits
+    rate_limiter = RateLimitMiddleware()
+    bot.session.middleware(rate_limiter)
+    
+    dp = Dispatcher(storage=SQLiteStorage(), rate_limiter=rate_limiter)
+    
+    # Register routers; channel menu clicks are the bulk of the traffic, so users' router goes first
     dp.include_router(user_router)
+    dp.include_router(admin_router)
+    timeline.mark("bot setup")
     
     # Initialize database
     logging.info("Initializing database...")
-    await setup_database()
+    db = await setup_database()
+    timeline.mark("database")
+    
+    setup_metrics(dp, bot, db, rate_limiter=rate_limiter, recorder=analytics)
+    metrics_runner = await start_metrics_server()
+    analytics.start()
+    auto_publisher.start(bot)
+    # Publish outstanding changes on shutdown, before aiogram closes the bot session
+    dp.shutdown.register(auto_publisher.stop)
+    compaction_task = asyncio.create_task(run_price_compaction(db))
+    timeline.mark("services")
     
-    # Start polling
-    logging.info("Starting bot...")
-    await bot.delete_webhook(drop_pending_updates=True)
-    await dp.start_polling(bot)
+    # Start receiving updates
+    logging.info("Starting bot in %s mode...", BOT_MODE)
+    try:
+        if BOT_MODE == "webhook":
+            @dp.startup()
+            async def log_startup():
+                timeline.mark("webhook server")
+                timeline.log()
+            
+            await run_webhook(dp, bot)
+        else:
+            bot.session.middleware(FirstPollMiddleware(timeline))
+            await bot.delete_webhook(drop_pending_updates=DROP_PENDING_UPDATES)
+            await dp.start_polling(bot)
+    finally:
+        compaction_task.cancel()
+        await analytics.stop()
+        await db.close()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
 
 if __name__ == "__main__":
     asyncio.run(main())